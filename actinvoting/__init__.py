@@ -12,18 +12,36 @@ from actinvoting.cultures.culture_mallows import CultureMallows
 from actinvoting.cultures.culture_perturbed import CulturePerturbed
 from actinvoting.cultures.culture_plackett_luce import CulturePlackettLuce
 
+from actinvoting.duel_count_distribution import DuelCountDistribution
 from actinvoting.equivalent_batch import equivalent_batch
 from actinvoting.exact_batch import exact_batch
 from actinvoting.mallows_three_first_theo import mallows_three_first_theo
 from actinvoting.mallows_three_last_theo import mallows_three_last_theo
 from actinvoting.monte_carlo_batch import monte_carlo_batch
 from actinvoting.my_tikzplotlib_save import my_tikzplotlib_save
+from actinvoting.numeric_snapshot import NumericSnapshot
 from actinvoting.plot_simu_and_theo import plot_simu_and_theo
 from actinvoting.plot_speed_ic import plot_speed_ic
+from actinvoting.probability import probability
 from actinvoting.probability_monte_carlo import probability_monte_carlo
 from actinvoting.profile import Profile
-from actinvoting.util import borda_from_ranking, ranking_from_borda, kendall_tau_id_ranking, kendall_tau_id_borda
+from actinvoting.profile_batch import ProfileBatch
+from actinvoting.upper_bound_batch import upper_bound_batch
+from actinvoting.util import borda_from_ranking, ranking_from_borda, kendall_tau_id_ranking, kendall_tau_id_borda, \
+    max_counts_of_thresholds
 from actinvoting.util_cache import cached_property, DeleteCacheMixin, property_deleting_cache
+from actinvoting.util_confidence import confidence_interval, half_width_reached
+from actinvoting.util_fft_power import fft_power_log_sum
+from actinvoting.util_gaussian import orthant_integral_of_gaussian, orthant_probability, \
+    orthant_probability_equicorrelated
+from actinvoting.util_lambdify_cache import fingerprint_of_expression, lambdify_with_cache, source_of_lambdified
+from actinvoting.util_saddle_point import log_chernoff_bounds, log_equivalent_constants, solve_saddle_point, \
+    tilted_moments
+from actinvoting.util_symmetric_power import symmetric_truncated_power_sum
 from actinvoting.util_time import current_time, elapsed_time
+from actinvoting.util_truncated_power import multiply_truncated, log_multiply_truncated, truncated_power, \
+    truncated_power_sums, truncated_power_log_sums, truncated_power_sum_sharded
 from actinvoting.work_session import WorkSession
+from actinvoting.work_session_all_candidates import WorkSessionAllCandidates
 from actinvoting.work_session_ic_condorcet import WorkSessionICCondorcet
+from actinvoting.work_session_parametric import WorkSessionParametric
@@ -1,9 +1,10 @@
 from collections import defaultdict
-from itertools import permutations
+from itertools import combinations, permutations, product
 
 import numpy as np
 
 from actinvoting.profile import Profile
+from actinvoting.profile_batch import ProfileBatch
 from actinvoting.util_cache import cached_property
 
 
@@ -135,6 +136,87 @@ class Culture:
         # `_random_profile_using_random_borda`.
         raise NotImplementedError
 
+    def random_profile_batch(self, n, size):
+        """
+        Batch of independent random profiles.
+
+        By default, for each profile, the number of voters of each ranking is drawn at once with a multinomial
+        distribution whose probabilities are given by `average_profile`. This is exact for a GIC, but it involves all
+        the m! rankings, so it is practical only for small m.
+
+        Parameters
+        ----------
+        n: int
+            Number of voters in each profile.
+        size: int
+            Number of profiles.
+
+        Returns
+        -------
+        ProfileBatch
+            A batch of `size` random profiles.
+
+        Examples
+        --------
+            >>> from actinvoting.cultures.culture_impartial import CultureImpartial
+            >>> batch = CultureImpartial(m=3, seed=42).random_profile_batch(n=5, size=1000)
+            >>> batch.weighted_majority_matrices.shape
+            (1000, 3, 3)
+            >>> bool(np.all(batch.weighted_majority_matrices + batch.weighted_majority_matrices.transpose(0, 2, 1)
+            ...             == 5 * (1 - np.eye(3))))
+            True
+        """
+        bordas = self.average_profile.unique_bordas
+        probas = np.array(self.average_profile.multiplicities, dtype=float)
+        probas /= probas.sum()
+        # For each ranking, its contribution to the weighted majority matrix.
+        duels = np.array(bordas[:, :, np.newaxis] > bordas[:, np.newaxis, :], dtype=int)
+        counts = self.rng.multinomial(n, probas, size=size)
+        return ProfileBatch(np.tensordot(counts, duels, axes=1))
+
+    def random_nested_profile_batches(self, ns, size):
+        """
+        Batches of nested random profiles, for several numbers of voters.
+
+        For each sample, a single stream of max(ns) voters is drawn, and the profile for each n in `ns` consists of the
+        n first voters. Hence the profiles of a sample are positively correlated across n (common random numbers),
+        and the total number of voters drawn is max(ns) instead of sum(ns).
+
+        Parameters
+        ----------
+        ns: list of int
+            Numbers of voters.
+        size: int
+            Number of samples.
+
+        Returns
+        -------
+        list of ProfileBatch
+            For each n in `ns`, a batch of `size` random profiles with n voters. Profile k of each batch is built from
+            the same stream of voters.
+
+        Examples
+        --------
+            >>> from actinvoting.cultures.culture_impartial import CultureImpartial
+            >>> batches = CultureImpartial(m=3, seed=42).random_nested_profile_batches(ns=[10, 5], size=1000)
+            >>> [int(batch.weighted_majority_matrices[0, 0, 1] + batch.weighted_majority_matrices[0, 1, 0])
+            ...  for batch in batches]
+            [10, 5]
+            >>> bool(np.all(batches[0].weighted_majority_matrices >= batches[1].weighted_majority_matrices))
+            True
+        """
+        ns = np.array(ns, dtype=np.int64)
+        weighted_majority_matrices = np.zeros((size, self.m, self.m), dtype=np.int64)
+        result = [None] * len(ns)
+        previous_n = 0
+        for i in np.argsort(ns, kind='stable'):
+            weighted_majority_matrices = (weighted_majority_matrices
+                                          + self.random_profile_batch(int(ns[i]) - previous_n, size)
+                                          .weighted_majority_matrices)
+            result[i] = ProfileBatch(weighted_majority_matrices)
+            previous_n = int(ns[i])
+        return result
+
     @cached_property
     def _average_profile_using_proba_ranking(self):
         """
@@ -179,6 +261,103 @@ class Culture:
         # `_average_profile_using_proba_borda`.
         raise NotImplementedError
 
+    def exchangeable_adversaries(self, c):
+        """
+        Groups of adversaries of `c` that play symmetric roles in the culture.
+
+        Two adversaries are exchangeable if swapping them does not change the distribution of the set of adversaries
+        that are higher than `c` in a random ranking. The distribution of the whole ranking need not be invariant:
+        e.g. in :class:`CulturePerturbed`, swapping two adversaries may move the pole. Then the probability that the
+        adversaries higher than `c` are exactly a set `higher` only depends on the number of adversaries of each group
+        in `higher`. The engines of :class:`WorkSession` use this to reduce the computations.
+
+        Parameters
+        ----------
+        c: int
+            A candidate.
+
+        Returns
+        -------
+        list of set
+            A partition of the adversaries of `c`. By default, each adversary is alone in its group (no symmetry is
+            assumed). Subclasses may return coarser partitions.
+        """
+        return [{d} for d in range(self.m) if d != c]
+
+    def condorcet_winner_distribution(self, n):
+        """
+        Exact distribution of the Condorcet winner in a profile of size n.
+
+        The probabilities for all the candidates are computed in a single dynamic program. The state is the vector of
+        pairwise tallies, i.e., for each pair of candidates a < b, the number of voters preferring a to b. The number
+        of voters is increased one by one, and each ranking of positive probability adds its vector of pairwise
+        preferences to the tallies.
+
+        To know the outcome of the duel between a and b, we only need to know whether the tally exceeds n/2, is equal
+        to n/2 or is below. Hence the tallies are saturated at floor(n/2) + 1: all the tallies above this value are
+        merged. The size of the table is (floor(n/2) + 2)^(m (m-1) / 2), so this is practical only for small m.
+
+        Parameters
+        ----------
+        n: int
+            Number of voters.
+
+        Returns
+        -------
+        tuple
+            An array of size m, with the probability that each candidate is the Condorcet winner, and the probability
+            that there is no Condorcet winner.
+
+        Examples
+        --------
+            >>> from actinvoting.cultures.culture_impartial import CultureImpartial
+            >>> probas, proba_no_winner = CultureImpartial(m=3).condorcet_winner_distribution(n=3)
+            >>> [f"{p:.6f}" for p in probas], f"{proba_no_winner:.6f}"  # 17/54 and 1/18
+            (['0.314815', '0.314815', '0.314815'], '0.055556')
+        """
+        pairs = list(combinations(range(self.m), 2))
+        bordas = self.average_profile.unique_bordas
+        weights = np.array(self.average_profile.multiplicities, dtype=float)
+        weights /= weights.sum()
+        # For each ranking, the indicator vector of the pairs (a, b) such that a is preferred to b.
+        duels = np.array([[borda[a] > borda[b] for a, b in pairs] for borda in bordas], dtype=bool)
+        cap = n // 2 + 1
+        ranking_weights = [(duel, weight) for duel, weight in zip(duels, weights) if weight != 0]
+        table = np.zeros((cap + 1, ) * len(pairs))
+        table[(0, ) * len(pairs)] = 1.
+        for k in range(n):
+            # Before this voter, the tallies are at most min(k, cap), so only this corner of the table is used. Adding
+            # the voter to a tally moves the slice [0, k] to [1, k + 1], or, once saturated, the slice [0, cap) to
+            # [1, cap] and the slice [cap] to itself. The other tallies are unchanged.
+            if k < cap:
+                shifts = [(slice(0, k + 1), slice(1, k + 2))]
+                unchanged = [(slice(0, k + 1), slice(0, k + 1))]
+            else:
+                shifts = [(slice(0, cap), slice(1, cap + 1)), (slice(cap, cap + 1), slice(cap, cap + 1))]
+                unchanged = [(slice(None), slice(None))]
+            new_table = np.zeros_like(table)
+            for duel, weight in ranking_weights:
+                for move in product(*[shifts if preferred else unchanged for preferred in duel]):
+                    source, destination = zip(*move)
+                    new_table[destination] += weight * table[source]
+            table = new_table
+        # Outcome of each duel: a beats b iff tally > n / 2, b beats a iff tally < n / 2.
+        tallies = np.arange(cap + 1)
+        a_wins = tallies > n / 2
+        b_wins = tallies < n / 2
+        probas = np.zeros(self.m)
+        exists_winner = np.zeros(table.shape, dtype=bool)
+        for c in range(self.m):
+            is_winner = np.ones(table.shape, dtype=bool)
+            for axis, (a, b) in enumerate(pairs):
+                if c in (a, b):
+                    shape = [1] * len(pairs)
+                    shape[axis] = cap + 1
+                    is_winner = is_winner & (a_wins if c == a else b_wins).reshape(shape)
+            probas[c] = table[is_winner].sum()
+            exists_winner = exists_winner | is_winner
+        return probas, float(table[~exists_winner].sum())
+
     def proba_high_low(self, c, higher, lower):
         """
         Probability that a random ranking places candidate `c` below certain adversaries and above the other ones.
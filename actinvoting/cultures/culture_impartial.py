@@ -34,6 +34,8 @@ class CultureImpartial(Culture):
         False
         >>> culture.proba_high_low(c=0, higher=set(), lower={1, 2, 3, 4, 5})
         1/6
+        >>> culture.exchangeable_adversaries(c=0)
+        [{1, 2, 3, 4, 5}]
     """
 
     def __repr__(self):
@@ -64,3 +66,7 @@ class CultureImpartial(Culture):
 
     def proba_high_low(self, c, higher, lower):
         return sympy.factorial(len(higher)) * sympy.factorial(len(lower)) / sympy.factorial(self.m)
+
+    def exchangeable_adversaries(self, c):
+        # All the adversaries are exchangeable.
+        return [{d for d in range(self.m) if d != c}]
@@ -43,6 +43,11 @@ class CulturePerturbed(Culture):
         >>> culture.proba_high_low(c=1, higher={}, lower={0, 2})
         1/6
 
+    The adversaries that are better (resp. worse) than `c` in the pole play symmetric roles:
+
+        >>> CulturePerturbed(m=6, theta=sympy.Rational(1, 2)).exchangeable_adversaries(c=2)
+        [{0, 1}, {3, 4, 5}]
+
     Particular case of a Dirac:
 
         >>> culture = CulturePerturbed(m=6, theta=1)
@@ -167,3 +172,8 @@ class CulturePerturbed(Culture):
         if len(higher) == c and all([h < c for h in higher]):
             proba += self.theta
         return proba
+
+    def exchangeable_adversaries(self, c):
+        # The adversaries that are better (resp. worse) than c in the pole are exchangeable.
+        groups = [set(range(c)), set(range(c + 1, self.m))]
+        return [group for group in groups if group]
@@ -0,0 +1,187 @@
+import os
+
+import numpy as np
+import sympy
+
+from actinvoting.util_truncated_power import truncated_power
+
+
+class DuelCountDistribution:
+    """
+    The joint distribution of the duel counts against a candidate c, in a profile of size n.
+
+    For each adversary j, let S_j be the number of voters preferring j to c. The joint probability mass function of
+    (S_j) is the tensor of coefficients of P^n, where P is the characteristic polynomial. It is computed once, along
+    with the cumulative distribution function (multidimensional cumulative sum). Then, the probability that c is an
+    alpha-winner, for any alpha, and other probabilities of rectangular events, are answered by a constant number of
+    table lookups.
+
+    Parameters
+    ----------
+    coefficients: ndarray
+        Coefficients of the characteristic polynomial, of shape (2, ..., 2) (d times, where d = m-1), e.g.
+        :attr:`WorkSession.characteristic_coefficients_as_floats`.
+    n: int
+        The number of voters.
+    file_name: str, optional
+        If specified, the tables are stored as memory-mapped ".npy" files, named `file_name` + "_pmf.npy" and
+        `file_name` + "_cdf.npy", and the coefficients are saved in `file_name` + "_coefficients.npy". If these files
+        already exist, with the same coefficients and tables of the right shape, they are loaded instead of being
+        computed. Otherwise, they are overwritten.
+
+    Examples
+    --------
+        >>> from actinvoting.cultures.culture_impartial import CultureImpartial
+        >>> from actinvoting.work_session import WorkSession
+        >>> session = WorkSession(culture=CultureImpartial(m=3), c=2)
+        >>> distribution = session.duel_count_distribution(n=3)
+        >>> distribution.pmf * 216
+        array([[ 8., 12.,  6.,  1.],
+               [12., 36., 27.,  6.],
+               [ 6., 27., 36., 12.],
+               [ 1.,  6., 12.,  8.]])
+        >>> print(f"{distribution.probability_alpha_winner(beta=[sympy.Rational(1, 2)] * 2):.6f}")  # 17/54
+        0.314815
+        >>> print(f"{distribution.probability_alpha_winner(beta=[sympy.Rational(3, 4)] * 2):.6f}")
+        0.787037
+
+    With a file name, the tables are reused only if they match the coefficients and n:
+
+        >>> import tempfile
+        >>> file_name = os.path.join(tempfile.mkdtemp(), "ic_3")
+        >>> session.duel_count_distribution(n=3, file_name=file_name).pmf.shape
+        (4, 4)
+        >>> session.duel_count_distribution(n=5, file_name=file_name).pmf.shape
+        (6, 6)
+    """
+
+    def __init__(self, coefficients, n, file_name=None):
+        self.n = n
+        self.d = coefficients.ndim
+        self.file_name = file_name
+        shape = (n + 1, ) * self.d
+        if file_name is not None and all(os.path.exists(file_name + suffix)
+                                         for suffix in ["_pmf.npy", "_cdf.npy", "_coefficients.npy"]):
+            self.pmf = np.load(file_name + "_pmf.npy", mmap_mode='r')
+            self.cdf = np.load(file_name + "_cdf.npy", mmap_mode='r')
+            if (self.pmf.shape == shape and self.cdf.shape == shape
+                    and np.array_equal(np.load(file_name + "_coefficients.npy"), coefficients)):
+                return
+            # The files were computed for another distribution.
+            del self.pmf, self.cdf
+        pmf = truncated_power(coefficients, n, [n] * self.d)
+        if file_name is None:
+            self.pmf = pmf
+            self.cdf = pmf.copy()
+        else:
+            self.pmf = np.lib.format.open_memmap(file_name + "_pmf.npy", mode='w+', dtype=float, shape=shape)
+            self.pmf[...] = pmf
+            self.cdf = np.lib.format.open_memmap(file_name + "_cdf.npy", mode='w+', dtype=float, shape=shape)
+            self.cdf[...] = pmf
+            del pmf
+        for axis in range(self.d):
+            np.cumsum(self.cdf, axis=axis, out=self.cdf)
+        if file_name is not None:
+            self.pmf.flush()
+            self.cdf.flush()
+            # Saved last, so that the files are reused only if they were completely written.
+            np.save(file_name + "_coefficients.npy", coefficients)
+
+    def probability_at_most(self, max_counts):
+        """
+        Probability that S_j <= max_counts[j] for each adversary j.
+
+        Parameters
+        ----------
+        max_counts: list of int
+            For each adversary, the maximal number of voters preferring it to c.
+
+        Returns
+        -------
+        float
+            The probability.
+        """
+        max_counts = np.array(max_counts, dtype=int)
+        if np.any(max_counts < 0):
+            return 0.
+        return float(self.cdf[tuple(np.minimum(max_counts, self.n))])
+
+    def probability_in_box(self, min_counts, max_counts):
+        """
+        Probability that min_counts[j] <= S_j <= max_counts[j] for each adversary j.
+
+        It is computed by inclusion-exclusion on the cumulative distribution function, with 2^d lookups.
+
+        Parameters
+        ----------
+        min_counts: list of int
+            For each adversary, the minimal number of voters preferring it to c.
+        max_counts: list of int
+            For each adversary, the maximal number of voters preferring it to c.
+
+        Returns
+        -------
+        float
+            The probability.
+        """
+        min_counts = np.maximum(np.array(min_counts, dtype=int), 0)
+        max_counts = np.minimum(np.array(max_counts, dtype=int), self.n)
+        if np.any(min_counts > max_counts):
+            return 0.
+        probability = 0.
+        for corner in np.ndindex((2, ) * self.d):
+            corner = np.array(corner, dtype=bool)
+            counts = np.where(corner, min_counts - 1, max_counts)
+            if np.all(counts >= 0):
+                probability += (-1) ** int(corner.sum()) * float(self.cdf[tuple(counts)])
+        return probability
+
+    def probability_alpha_winner(self, beta):
+        """
+        Probability that c is an alpha-winner, i.e. that S_j < beta[j] n for each adversary j.
+
+        Parameters
+        ----------
+        beta: list of sympy.Rational
+            For each adversary j (in increasing order), the threshold beta[j] = 1 - alpha[j].
+
+        Returns
+        -------
+        float
+            The probability.
+        """
+        return self.probability_at_most([int(sympy.ceiling(sympy.Rational(beta_j) * self.n)) - 1 for beta_j in beta])
+
+    def probability_margins_at_most(self, margins):
+        """
+        Probability that the margin of each adversary j against c, i.e. S_j - (n - S_j), is at most margins[j].
+
+        Parameters
+        ----------
+        margins: list of int
+            For each adversary, the maximal margin.
+
+        Returns
+        -------
+        float
+            The probability.
+        """
+        return self.probability_at_most([(self.n + margin) // 2 for margin in margins])
+
+    def marginal(self, j):
+        """
+        The distribution of the duel count of one adversary.
+
+        Parameters
+        ----------
+        j: int
+            The index of the adversary (among the d adversaries, in increasing order).
+
+        Returns
+        -------
+        ndarray
+            Vector of size n + 1. Element k is the probability that S_j = k.
+        """
+        index = [self.n] * self.d
+        index[j] = slice(None)
+        return np.diff(self.cdf[tuple(index)], prepend=0.)
@@ -1,7 +1,5 @@
 import pickle
 
-from joblib import Parallel, delayed
-
 from actinvoting.util_time import current_time, elapsed_time
 
 
@@ -17,7 +15,8 @@ def equivalent_batch(session, ns, n_jobs=1, file_name=None, force_recompute=Fals
         The list of values of n (number of voters) for which the values of the theoretical equivalent are to be
         computed.
     n_jobs: int
-        The number of parallel jobs to run. If n_jobs=1, the computation is done in a single process.
+        Not used anymore, since the computation is vectorized (cf. :meth:`WorkSession.equivalent_many`). This parameter
+        is kept for backward compatibility.
     file_name: str
         The name of the file where the result is saved. If None, the file name is automatically generated.
     force_recompute: bool
@@ -47,13 +46,9 @@ def equivalent_batch(session, ns, n_jobs=1, file_name=None, force_recompute=Fals
         except FileNotFoundError:
             pass
 
-    # Define the function to be parallelized
-    def proba_equivalent(n):
-        return float(session.equivalent(n=n))
-
-    # Run the parallelized function
+    # Run the vectorized function
     start_time = current_time()
-    result = list(Parallel(n_jobs=n_jobs)(delayed(proba_equivalent)(n) for n in ns))
+    result = [float(p) for p in session.numeric_snapshot.equivalent_many(ns)]
     run_time_seconds, run_time_str = elapsed_time(start_time)
     print(f'{run_time_str=}')
 
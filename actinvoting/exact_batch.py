@@ -1,11 +1,14 @@
 import pickle
 
+import numpy as np
 from joblib import Parallel, delayed
 
 from actinvoting.util_time import current_time, elapsed_time
+from actinvoting.util_truncated_power import truncated_power_sum_sharded
 
 
-def exact_batch(session, ns, n_jobs=1, file_name=None, force_recompute=False):
+def exact_batch(session, ns, n_jobs=1, file_name=None, force_recompute=False, method="sympy",
+                tolerance=None):
     """
     Compute the exact probabilities for a list of values of n.
 
@@ -21,20 +24,38 @@ def exact_batch(session, ns, n_jobs=1, file_name=None, force_recompute=False):
         The name of the file where the result is saved. If None, the file name is automatically generated.
     force_recompute: bool
         If True, the computation is done even if the file already exists.
+    method: str
+        The engine used for the computation, cf. :meth:`WorkSession.exact_probability`. With "numeric", all the values
+        of n are computed in a single incremental pass (cf. :meth:`WorkSession.exact_probabilities`) and `n_jobs` is
+        not used. With "log", the computation is done in the same way, but in log-space (cf.
+        :meth:`WorkSession.exact_log_probabilities`), and the returned values are the natural logarithms of the
+        probabilities. With "fft", only the numeric snapshot of the session is sent to the workers (cf.
+        :attr:`WorkSession.numeric_snapshot`). With "sharded", the values of n are computed one after the other, and
+        each computation is split among `n_jobs` processes (cf. :func:`truncated_power_sum_sharded`).
+    tolerance: float, optional
+        If specified, the values of n for which the Chernoff upper bound (cf. :meth:`WorkSession.upper_bound_many`) is
+        below `tolerance` are not computed: NaN is returned instead, so that it cannot be mistaken for a computed
+        value, and these values of n are printed along with their upper bounds.
 
     Returns
     -------
     list of float
-        The list of exact probabilities for the values of n in the input list.
+        The list of exact probabilities (or their logarithms if `method` is "log") for the values of n in the input
+        list. For the values of n that are skipped because of `tolerance`, the value is NaN.
     """
     # Default parameters
     culture = session.culture
     c = session.c
+    # Each engine has its own file, since their results differ (e.g. logarithms, or rounding errors). The file name
+    # of the default engine is unchanged, so that the existing files are still found.
+    suffix = "_exact" if method == "sympy" else f"_{method=}_exact"
+    if tolerance is not None:
+        suffix = f"_{tolerance=}" + suffix
     if file_name is None:
-        file_name = (str(culture) + f"_{c=}_{ns=}_exact").\
+        file_name = (str(culture) + f"_{c=}_{ns=}" + suffix).\
                         replace(' ', '_').replace('/', '_') + '.pkl'
     if len(file_name) >= 255:
-        file_name = (str(culture) + f"_{c=}_hash(ns)={hash(tuple(ns))}_exact").\
+        file_name = (str(culture) + f"_{c=}_hash(ns)={hash(tuple(ns))}" + suffix).\
                         replace(' ', '_').replace('/', '_') + '.pkl'
 
     # Try to load the file
@@ -48,11 +69,40 @@ def exact_batch(session, ns, n_jobs=1, file_name=None, force_recompute=False):
 
     # Define the function to be parallelized
     def proba_exact(n):
-        return float(session.exact_probability(n=n))
+        return float(session.exact_probability(n=n, method=method))
+
+    # Skip the values of n where the probability is negligible
+    d_n_upper_bound = {}
+    if tolerance is not None:
+        log_upper_bounds = session.log_upper_bound_many(ns)
+        d_n_upper_bound = {n: float(log_upper_bound if method == "log" else np.exp(log_upper_bound))
+                           for n, log_upper_bound in zip(ns, log_upper_bounds) if log_upper_bound < np.log(tolerance)}
+        print(f"Skipped because of the upper bound: {d_n_upper_bound=}")
+    ns_computed = [n for n in ns if n not in d_n_upper_bound]
 
     # Run the parallelized function
     start_time = current_time()
-    result = list(Parallel(n_jobs=n_jobs)(delayed(proba_exact)(n) for n in ns))
+    if method == "numeric":
+        # A single incremental pass over n is cheaper than independent computations.
+        result = session.exact_probabilities(ns_computed)
+    elif method == "log":
+        result = session.exact_log_probabilities(ns_computed)
+    elif method == "sharded":
+        # The parallelism is inside each computation, so the values of n are processed one after the other.
+        result = [
+            truncated_power_sum_sharded(session.characteristic_coefficients_as_floats, n, session.max_counts(n),
+                                        n_jobs=n_jobs)
+            for n in ns_computed
+        ]
+    elif method == "fft":
+        # Only the numeric snapshot is sent to the workers, not the whole session.
+        snapshot = session.numeric_snapshot
+        result = list(Parallel(n_jobs=n_jobs)(delayed(snapshot.exact_probability)(n, method) for n in ns_computed))
+    else:
+        result = list(Parallel(n_jobs=n_jobs)(delayed(proba_exact)(n) for n in ns_computed))
+    if d_n_upper_bound:
+        d_n_computed = dict(zip(ns_computed, result))
+        result = [d_n_computed.get(n, np.nan) for n in ns]
     run_time_seconds, run_time_str = elapsed_time(start_time)
     print(f'{run_time_str=}')
 
@@ -1,12 +1,18 @@
+import copy
 import pickle
 
+import numpy as np
 from joblib import Parallel, delayed
 
 from actinvoting.probability_monte_carlo import probability_monte_carlo
+from actinvoting.util_confidence import confidence_interval, half_width_reached
 from actinvoting.util_time import current_time, elapsed_time
 
 
-def monte_carlo_batch(session, ns, n_samples, n_jobs=1, file_name=None, force_recompute=False):
+def monte_carlo_batch(session, ns, n_samples, n_jobs=1, file_name=None, force_recompute=False,
+                      tolerance=None, batch_size=None, interval=None, confidence_level=.95, half_width=None,
+                      relative=False, max_samples=None, method="profiles", nested=False, seed=None,
+                      chunk_size=None):
     """
     Estimate probabilities using the Monte Carlo method for a list of values of n.
 
@@ -25,20 +31,90 @@ def monte_carlo_batch(session, ns, n_samples, n_jobs=1, file_name=None, force_re
         The name of the file where the result is saved. If None, the file name is automatically generated.
     force_recompute: bool
         If True, the computation is done even if the file already exists.
+    tolerance: float, optional
+        If specified, the values of n for which the Chernoff upper bound (cf. :meth:`WorkSession.upper_bound_many`) is
+        below `tolerance` are not estimated: NaN is returned instead, so that it cannot be mistaken for an estimate,
+        and these values of n are printed along with their upper bounds.
+    batch_size: int, optional
+        If specified, the random profiles are drawn by batches of this size (cf. :meth:`Culture.random_profile_batch`),
+        which is much faster for small numbers of candidates. Otherwise, they are drawn one by one.
+    interval: str, optional
+        If specified, a confidence interval is computed for each n, cf. :func:`probability_monte_carlo`.
+    confidence_level: float
+        The confidence level of the intervals.
+    half_width: float, optional
+        If specified, for each n, the sampling goes on by rounds of `n_samples` samples until the half-width of the
+        confidence interval is at most `half_width`, cf. :func:`probability_monte_carlo`.
+    relative: bool
+        If True, `half_width` is relative to the estimated probability.
+    max_samples: int, optional
+        In sequential mode, the maximal number of samples for each n.
+    method: str
+        With "profiles", random profiles are drawn and we test whether `c` is the Condorcet winner. With "duels", only
+        the vectors of duel counts against `c` are drawn (cf. :meth:`WorkSession.random_duel_counts`) and we test
+        whether `c` is an alpha-winner. For the default alpha, the two events coincide, but "duels" is much faster:
+        the cost of a sample does not depend on n. With "duels", the samples are drawn by batches of `batch_size`
+        (default: 10000).
+    nested: bool
+        If True, all the values of n are estimated at once with common random numbers: for each sample, a single
+        stream of max(ns) voters is drawn, and the outcome is recorded for the n first voters, for each n in `ns` (cf.
+        :meth:`Culture.random_nested_profile_batches` and :meth:`WorkSession.random_nested_duel_counts`). This divides
+        the sampling work by about len(ns), and the estimates are positively correlated across n, so the curves are
+        smooth. The samples are drawn by batches of `batch_size` (default: 10000), and `n_jobs` is not used. In
+        sequential mode, the sampling stops when the target is reached for all the values of n.
+    seed: int, optional
+        If `seed` or `chunk_size` is specified, the samples of each n (or of all the values of n, if `nested`) are split
+        into chunks of `chunk_size` samples, which are distributed among `n_jobs` processes, and the numbers of
+        successes are merged. Hence all the processes are used even for a single value of n. Each chunk has its own
+        random generator, spawned from `numpy.random.SeedSequence(seed)`, so the result only depends on `seed` and
+        `chunk_size`, not on `n_jobs`. In sequential mode, the chunks are processed by rounds of `n_samples` samples.
+    chunk_size: int, optional
+        The number of samples of a chunk. Default: 10000.
 
     Returns
     -------
-    list of float
-        The list of estimated probabilities for the values of n in the input list.
+    list
+        The list of estimated probabilities for the values of n in the input list. If `interval` or `half_width` is
+        specified, each element is a tuple (probability, lower bound, upper bound) instead. For the values of n that
+        are skipped because of `tolerance`, the value is NaN (or a tuple of NaN).
+
+    Examples
+    --------
+    With `seed`, the result does not depend on the number of jobs:
+
+        >>> import os
+        >>> import tempfile
+        >>> import sympy
+        >>> from actinvoting.cultures.culture_mallows import CultureMallows
+        >>> from actinvoting.work_session import WorkSession
+        >>> session = WorkSession(culture=CultureMallows(m=3, phi=sympy.Rational(1, 2)), c=2)
+        >>> file_name = os.path.join(tempfile.mkdtemp(), "mc.pkl")
+        >>> results = [
+        ...     monte_carlo_batch(session, ns=[11, 21], n_samples=20000, n_jobs=n_jobs, file_name=file_name,
+        ...                       force_recompute=True, method="duels", seed=42, chunk_size=5000)
+        ...     for n_jobs in [1, 2]
+        ... ]  # doctest: +ELLIPSIS
+        run_time_str='...'
+        run_time_str='...'
+        >>> results[0] == results[1]
+        True
+        >>> results[0]
+        [0.0091, 0.00125]
     """
     # Default parameters
     culture = session.culture
     c = session.c
+    with_intervals = interval is not None or half_width is not None
+    chunked = seed is not None or chunk_size is not None
+    if chunked and chunk_size is None:
+        chunk_size = 10000
+    suffix = _suffix(tolerance, interval, confidence_level, half_width, relative, max_samples, method, nested, seed,
+                     chunk_size)
     if file_name is None:
-        file_name = (str(culture) + f"_{c=}_{ns=}_{n_samples=}_mc").\
+        file_name = (str(culture) + f"_{c=}_{ns=}_{n_samples=}" + suffix + "_mc").\
                         replace(' ', '_').replace('/', '_') + '.pkl'
     if len(file_name) >= 255:
-        file_name = (str(culture) + f"_{c=}_hash(ns)={hash(tuple(ns))}_{n_samples=}_mc").\
+        file_name = (str(culture) + f"_{c=}_hash(ns)={hash(tuple(ns))}_{n_samples=}" + suffix + "_mc").\
                         replace(' ', '_').replace('/', '_') + '.pkl'
 
     # Try to load the file
@@ -50,17 +126,34 @@ def monte_carlo_batch(session, ns, n_samples, n_jobs=1, file_name=None, force_re
         except FileNotFoundError:
             pass
 
-    # Define the function to be parallelized
-    def proba_mc(n):
-        return probability_monte_carlo(
-            factory=lambda : culture.random_profile(n=n),
-            n_samples=n_samples,
-            test=lambda profile: profile.is_condorcet_winner[c],
-        )
+    # Skip the values of n where the probability is negligible
+    d_n_upper_bound = {}
+    if tolerance is not None:
+        d_n_upper_bound = {n: float(upper_bound) for n, upper_bound in zip(ns, session.upper_bound_many(ns))
+                           if upper_bound < tolerance}
+        print(f"Skipped because of the upper bound: {d_n_upper_bound=}")
+    ns_computed = [n for n in ns if n not in d_n_upper_bound]
 
-    # Run the parallelized function
+    # Run the estimations. Only the numeric snapshot of the session (for "duels") and the culture are sent to the
+    # workers. Each group of values of n is estimated with the same samples.
     start_time = current_time()
-    result = list(Parallel(n_jobs=n_jobs)(delayed(proba_mc)(n) for n in ns))
+    snapshot = session.numeric_snapshot if method == "duels" else None
+    groups = [ns_computed] if nested and ns_computed else [[n] for n in ns_computed]
+    if chunked:
+        outputs = _monte_carlo_chunked(
+            snapshot, culture, c, groups, n_samples, n_jobs, batch_size, interval, confidence_level, half_width,
+            relative, max_samples, method, nested, seed, chunk_size)
+    else:
+        outputs = Parallel(n_jobs=1 if nested else n_jobs)(
+            delayed(_monte_carlo_group)(snapshot, culture, c, group, n_samples, batch_size, interval, confidence_level,
+                                        half_width, relative, max_samples, method, nested)
+            for group in groups
+        )
+    result = [output for group_outputs in outputs for output in group_outputs]
+    if d_n_upper_bound:
+        d_n_computed = dict(zip(ns_computed, result))
+        skipped = (np.nan, np.nan, np.nan) if with_intervals else np.nan
+        result = [d_n_computed.get(n, skipped) for n in ns]
     run_time_seconds, run_time_str = elapsed_time(start_time)
     print(f'{run_time_str=}')
 
@@ -68,3 +161,117 @@ def monte_carlo_batch(session, ns, n_samples, n_jobs=1, file_name=None, force_re
     with open(file_name, 'wb') as f:
         pickle.dump(result, f)
     return result
+
+
+def _suffix(tolerance, interval, confidence_level, half_width, relative, max_samples, method, nested, seed,
+            chunk_size):
+    """
+    Suffix of the file name of :func:`monte_carlo_batch`, describing the options that change the result.
+    """
+    suffix = "" if tolerance is None else f"_{tolerance=}"
+    if interval is not None or half_width is not None:
+        suffix += f"_{interval=}_{confidence_level=}_{half_width=}_{relative=}_{max_samples=}"
+    if method != "profiles":
+        suffix += f"_{method=}"
+    if nested:
+        suffix += "_nested"
+    if chunk_size is not None:
+        suffix += f"_{seed=}_{chunk_size=}"
+    return suffix
+
+
+def _sampler(snapshot, culture, c, ns, method, nested, batch_size):
+    """
+    Factory and tests of :func:`probability_monte_carlo` for the values in `ns`, along with the batch size.
+
+    The samples are drawn with the generator of `culture`. If the batch size is None, the samples are drawn one by
+    one. Otherwise, for each sample, the outcome is recorded for each value in `ns` (which has a single element
+    unless `nested`).
+    """
+    if method == "duels":
+        max_counts = snapshot.max_counts_many(ns)
+        factory = lambda size: snapshot.random_nested_duel_counts(ns=ns, size=size, rng=culture.rng)
+        test = tuple(lambda counts, i=i: np.all(counts[:, i] <= max_counts[i], axis=1) for i in range(len(ns)))
+    elif method != "profiles":
+        raise ValueError(f"Unknown method: {method}.")
+    elif nested or batch_size is not None:
+        factory = lambda size: culture.random_nested_profile_batches(ns=ns, size=size)
+        test = tuple(lambda batches, i=i: batches[i].is_condorcet_winner[:, c] for i in range(len(ns)))
+    else:
+        return lambda: culture.random_profile(n=ns[0]), (lambda profile: profile.is_condorcet_winner[c], ), None
+    return factory, test, 10000 if batch_size is None else batch_size
+
+
+def _monte_carlo_group(snapshot, culture, c, ns, n_samples, batch_size, interval, confidence_level, half_width,
+                       relative, max_samples, method, nested):
+    """
+    Estimations of :func:`monte_carlo_batch` for the values in `ns`, with the generator of the culture.
+    """
+    factory, test, batch_size = _sampler(snapshot, culture, c, ns, method, nested, batch_size)
+    return list(probability_monte_carlo(
+        factory=factory, n_samples=n_samples, test=test, batch_size=batch_size, interval=interval,
+        confidence_level=confidence_level, half_width=half_width, relative=relative, max_samples=max_samples,
+    ))
+
+
+def _monte_carlo_chunked(snapshot, culture, c, groups, n_samples, n_jobs, batch_size, interval, confidence_level,
+                         half_width, relative, max_samples, method, nested, seed, chunk_size):
+    """
+    Estimations of :func:`monte_carlo_batch`, with the samples of each group split into chunks with their own
+    generators.
+    """
+    group_seed_sequences = np.random.SeedSequence(seed).spawn(len(groups))
+    successes = [np.zeros(len(group), dtype=np.int64) for group in groups]
+    n_done = [0 for _ in groups]
+    if max_samples is None:
+        max_samples = 100 * n_samples
+    active = list(range(len(groups)))
+    while active:
+        tasks = []
+        for g in active:
+            round_size = n_samples if n_done[g] == 0 else min(n_samples, max_samples - n_done[g])
+            sizes = [min(chunk_size, round_size - start) for start in range(0, round_size, chunk_size)]
+            # The seed sequences are spawned in a deterministic order, whatever the number of jobs.
+            tasks.extend((g, size, seed_sequence)
+                         for size, seed_sequence in zip(sizes, group_seed_sequences[g].spawn(len(sizes))))
+        outputs = Parallel(n_jobs=n_jobs)(
+            delayed(_successes_of_chunk)(snapshot, culture, c, groups[g], size, seed_sequence, method, nested,
+                                         batch_size)
+            for g, size, seed_sequence in tasks
+        )
+        for (g, size, _), output in zip(tasks, outputs):
+            successes[g] += output
+            n_done[g] += size
+        if half_width is None:
+            break
+        active = [g for g in active if n_done[g] < max_samples and not half_width_reached(
+            successes[g], n_done[g], half_width, relative, interval or "wilson", confidence_level)]
+    if interval is None and half_width is None:
+        return [[int(n_successes) / group_n_done for n_successes in group_successes]
+                for group_successes, group_n_done in zip(successes, n_done)]
+    result = []
+    for group_successes, group_n_done in zip(successes, n_done):
+        lower, upper = confidence_interval(group_successes, group_n_done, interval or "wilson", confidence_level)
+        result.append([(int(n_successes) / group_n_done, float(low), float(high))
+                       for n_successes, low, high in zip(group_successes, lower, upper)])
+    return result
+
+
+def _successes_of_chunk(snapshot, culture, c, ns, size, seed_sequence, method, nested, batch_size):
+    """
+    Numbers of successes for each value in `ns`, in a chunk of `size` samples drawn with their own generator.
+    """
+    # The culture is copied so that its own generator is not used.
+    culture = copy.copy(culture)
+    culture.rng = np.random.default_rng(seed_sequence)
+    factory, test, batch_size = _sampler(snapshot, culture, c, ns, method, nested, batch_size)
+    successes = np.zeros(len(ns), dtype=np.int64)
+    if batch_size is None:
+        for _ in range(size):
+            sample = factory()
+            successes += [bool(the_test(sample)) for the_test in test]
+    else:
+        for start in range(0, size, batch_size):
+            samples = factory(min(batch_size, size - start))
+            successes += [np.count_nonzero(the_test(samples)) for the_test in test]
+    return successes
@@ -0,0 +1,374 @@
+from dataclasses import dataclass
+
+import numpy as np
+from scipy.special import logsumexp
+
+from actinvoting.util import max_counts_of_thresholds
+from actinvoting.util_cache import cached_property
+from actinvoting.util_fft_power import fft_power_log_sum
+from actinvoting.util_saddle_point import log_chernoff_bounds
+from actinvoting.util_truncated_power import truncated_power, truncated_power_log_sums, truncated_power_sums
+
+
+@dataclass(frozen=True, eq=False)
+class NumericSnapshot:
+    """
+    The numerical values of a work session, as plain NumPy arrays.
+
+    A snapshot is obtained by :attr:`WorkSession.numeric_snapshot`. Unlike the work session, it contains no sympy
+    objects and no cache, so it is cheap to pickle, e.g. to send it to worker processes. It provides the numerical
+    methods of the work session that do not need symbolic computations.
+
+    All the vectors are indexed by the adversaries of `c`, in increasing order.
+
+    Parameters
+    ----------
+    c: int
+        The candidate of interest.
+    beta_numerators: tuple of int
+        The numerators of the thresholds beta[j].
+    beta_denominators: tuple of int
+        The denominators of the thresholds beta[j].
+    coefficients: ndarray
+        The coefficients of the characteristic polynomial, of shape (2, ..., 2) (m-1 times).
+    log_coefficients: ndarray
+        Their logarithms (-inf for null coefficients).
+    tau: ndarray
+        The log saddle point.
+    zeta: ndarray
+        The saddle point.
+    hessian: ndarray
+        The Hessian of the cumulant at tau.
+    subcritical: ndarray
+        Boolean mask of the subcritical adversaries.
+    critical: ndarray
+        Boolean mask of the critical adversaries.
+    integral: float
+        The integral of the Gaussian function over the positive orthant that appears in the theoretical equivalent.
+    integral_error: float
+        The margin of error on this integral.
+
+    Examples
+    --------
+        >>> import pickle
+        >>> import sympy
+        >>> from actinvoting.cultures.culture_mallows import CultureMallows
+        >>> from actinvoting.work_session import WorkSession
+        >>> session = WorkSession(culture=CultureMallows(m=3, phi=sympy.Rational(1, 2)), c=2)
+        >>> snapshot = pickle.loads(pickle.dumps(session.numeric_snapshot))
+        >>> snapshot.tau.round(4)
+        array([-1.0397, -0.3466])
+        >>> print(f"{snapshot.equivalent_many([10])[0]:.6f}")
+        0.015905
+        >>> print(f"{snapshot.exact_probabilities([10])[0]:.6f}")
+        0.004440
+    """
+    c: int
+    beta_numerators: tuple
+    beta_denominators: tuple
+    coefficients: np.ndarray
+    log_coefficients: np.ndarray
+    tau: np.ndarray
+    zeta: np.ndarray
+    hessian: np.ndarray
+    subcritical: np.ndarray
+    critical: np.ndarray
+    integral: float
+    integral_error: float
+
+    def __post_init__(self):
+        for value in self.__dict__.values():
+            if isinstance(value, np.ndarray):
+                value.flags.writeable = False
+        # The cached properties are stored in this dictionary, which is mutable even though the instance is frozen.
+        object.__setattr__(self, '_cached_properties', {})
+
+    @cached_property
+    def higher_set_indicators(self):
+        """
+        The indicators of the possible higher sets, in the same order as the flattened coefficients.
+
+        Returns
+        -------
+        ndarray
+            Array of shape (2^(m-1), m-1).
+        """
+        return np.array(list(np.ndindex(self.coefficients.shape)), dtype=int).reshape(-1, self.coefficients.ndim)
+
+    @cached_property
+    def higher_set_probabilities(self):
+        """
+        The probabilities of the possible higher sets, in the same order as `higher_set_indicators`.
+
+        Returns
+        -------
+        ndarray
+            Vector of size 2^(m-1): the flattened coefficients, normalized so that they sum to 1 despite the rounding
+            errors (as required by the multinomial sampler).
+        """
+        probabilities = self.coefficients.ravel()
+        return probabilities / probabilities.sum()
+
+    def max_counts_many(self, ns):
+        """
+        The maximal numbers of voters preferring each adversary to `c` such that `c` is an alpha-winner.
+
+        Cf. :meth:`WorkSession.max_counts_many`.
+
+        Parameters
+        ----------
+        ns: list of int
+            The numbers of voters.
+
+        Returns
+        -------
+        ndarray
+            Array of shape (len(ns), m-1). Element (i, j) is ceil(beta[j] ns[i]) - 1.
+        """
+        return max_counts_of_thresholds(self.beta_numerators, self.beta_denominators, ns)
+
+    def log_equivalent_many(self, ns):
+        """
+        The logarithm of the theoretical equivalent, for an array of values of n.
+
+        Cf. :meth:`WorkSession.log_equivalent_many`.
+
+        Parameters
+        ----------
+        ns: list of int
+            The numbers of voters.
+
+        Returns
+        -------
+        ndarray
+            The natural logarithms of the theoretical equivalent, for each value in `ns`.
+        """
+        if not np.all(self.subcritical | self.critical):
+            raise NotImplementedError("Supercritical cases are not implemented yet.")
+        tau_subcritical = self.tau[self.subcritical]
+        ns = np.array(ns, dtype=float).ravel()
+        exponents = self.max_counts_many(ns)[:, self.subcritical]
+        return (ns * self.log_p_of_zeta - exponents @ tau_subcritical - len(tau_subcritical) * np.log(ns) / 2
+                + self.log_equivalent_constant)
+
+    @cached_property
+    def log_p_of_zeta(self):
+        """
+        The logarithm of P(zeta).
+
+        Returns
+        -------
+        float
+            The natural logarithm of the characteristic polynomial at the saddle point.
+        """
+        return float(logsumexp(self.log_coefficients.ravel() + self.higher_set_indicators @ self.tau))
+
+    @cached_property
+    def log_equivalent_constant(self):
+        """
+        The part of the logarithm of the theoretical equivalent that depends neither on n nor on the thresholds.
+
+        Returns
+        -------
+        float
+            log(integral) - sum_{j subcritical} log(1 - zeta[j]) - ((m-1) log(2 pi) + log(det(hessian))) / 2.
+        """
+        return float(
+            np.log(self.integral) - np.sum(np.log(-np.expm1(self.tau[self.subcritical])))
+            - (len(self.tau) * np.log(2 * np.pi) + np.linalg.slogdet(self.hessian)[1]) / 2
+        )
+
+    def equivalent_many(self, ns):
+        """
+        The theoretical equivalent, for an array of values of n.
+
+        Parameters
+        ----------
+        ns: list of int
+            The numbers of voters.
+
+        Returns
+        -------
+        ndarray
+            The values of the theoretical equivalent, for each value in `ns`.
+        """
+        return np.exp(self.log_equivalent_many(ns))
+
+    def log_upper_bound_many(self, ns):
+        """
+        The logarithm of a rigorous upper bound of the probability, for an array of values of n.
+
+        Cf. :meth:`WorkSession.log_upper_bound_many`.
+
+        Parameters
+        ----------
+        ns: list of int
+            The numbers of voters.
+
+        Returns
+        -------
+        ndarray
+            The natural logarithms of the upper bound, for each value in `ns`.
+        """
+        return log_chernoff_bounds(self.log_coefficients.ravel(), self.higher_set_indicators, self.tau, ns,
+                                   self.max_counts_many(ns))
+
+    def upper_bound_many(self, ns):
+        """
+        A rigorous upper bound of the probability, for an array of values of n.
+
+        Parameters
+        ----------
+        ns: list of int
+            The numbers of voters.
+
+        Returns
+        -------
+        ndarray
+            The values of the upper bound, for each value in `ns`.
+        """
+        return np.exp(self.log_upper_bound_many(ns))
+
+    def exact_probability(self, n, method="numeric"):
+        """
+        The exact probability that candidate c is an alpha-winner in a profile of size n.
+
+        Parameters
+        ----------
+        n: int
+            The number of voters.
+        method: str
+            "numeric" or "fft", cf. :meth:`WorkSession.exact_probability`.
+
+        Returns
+        -------
+        float
+            The exact probability.
+        """
+        if method == "numeric":
+            max_counts = self.max_counts_many([n])[0]
+            if np.any(max_counts < 0):
+                return 0.
+            return float(truncated_power(self.coefficients, n, max_counts).sum())
+        if method == "fft":
+            return self.exact_probability_fft_with_error(n)[0]
+        raise ValueError(f"Unknown method: {method}.")
+
+    def exact_probabilities(self, ns):
+        """
+        The exact probabilities for several values of n, in a single pass.
+
+        Cf. :meth:`WorkSession.exact_probabilities`.
+
+        Parameters
+        ----------
+        ns: list of int
+            The numbers of voters.
+
+        Returns
+        -------
+        list of float
+            The exact probabilities, in the same order as `ns`.
+        """
+        ns = list(ns)
+        return [float(p) for p in truncated_power_sums(self.coefficients, ns, self.max_counts_many(ns))]
+
+    def exact_log_probabilities(self, ns):
+        """
+        The logarithms of the exact probabilities for several values of n, in a single pass.
+
+        Cf. :meth:`WorkSession.exact_log_probabilities`.
+
+        Parameters
+        ----------
+        ns: list of int
+            The numbers of voters.
+
+        Returns
+        -------
+        list of float
+            The natural logarithms of the exact probabilities, in the same order as `ns`.
+        """
+        ns = list(ns)
+        return [float(log_p) for log_p in truncated_power_log_sums(self.log_coefficients, ns, self.max_counts_many(ns))]
+
+    def exact_probability_fft_with_error(self, n):
+        """
+        The exact probability computed by FFT, along with an error bound.
+
+        Cf. :meth:`WorkSession.exact_probability_fft_with_error`.
+
+        Parameters
+        ----------
+        n: int
+            The number of voters.
+
+        Returns
+        -------
+        tuple of float
+            The probability, along with a bound on the absolute error.
+        """
+        max_counts = self.max_counts_many([n])[0]
+        if np.any(max_counts < 0):
+            return 0., 0.
+        # For a supercritical adversary, we do not tilt in its direction.
+        log_probability, log_error = fft_power_log_sum(self.coefficients, np.minimum(self.tau, 0.), n, max_counts)
+        return float(np.exp(log_probability)), float(np.exp(log_error))
+
+    def random_duel_counts(self, n, size, rng=None):
+        """
+        Random vectors of duel counts against `c`, without drawing the profiles.
+
+        Cf. :meth:`WorkSession.random_duel_counts`.
+
+        Parameters
+        ----------
+        n: int
+            The number of voters.
+        size: int
+            The number of samples.
+        rng: numpy.random.Generator, optional
+            The random generator. Default: a new generator with a random seed.
+
+        Returns
+        -------
+        ndarray
+            Array of shape (size, m-1). Element (k, j) is the number of voters preferring the j-th adversary (in
+            increasing order) to `c` in sample k.
+        """
+        if rng is None:
+            rng = np.random.default_rng()
+        return rng.multinomial(n, self.higher_set_probabilities, size=size) @ self.higher_set_indicators
+
+    def random_nested_duel_counts(self, ns, size, rng=None):
+        """
+        Random vectors of duel counts against `c` for several numbers of voters, with nested profiles.
+
+        Cf. :meth:`WorkSession.random_nested_duel_counts`.
+
+        Parameters
+        ----------
+        ns: list of int
+            The numbers of voters.
+        size: int
+            The number of samples.
+        rng: numpy.random.Generator, optional
+            The random generator. Default: a new generator with a random seed.
+
+        Returns
+        -------
+        ndarray
+            Array of shape (size, len(ns), m-1). Element (k, i, j) is the number of voters preferring the j-th
+            adversary (in increasing order) to `c` among the ns[i] first voters of sample k.
+        """
+        if rng is None:
+            rng = np.random.default_rng()
+        ns = np.array(ns, dtype=np.int64)
+        counts_per_higher_set = np.zeros((size, len(self.higher_set_probabilities)), dtype=np.int64)
+        result = np.zeros((size, len(ns), self.coefficients.ndim), dtype=np.int64)
+        previous_n = 0
+        for i in np.argsort(ns, kind='stable'):
+            counts_per_higher_set += rng.multinomial(int(ns[i]) - previous_n, self.higher_set_probabilities, size=size)
+            result[:, i] = counts_per_higher_set @ self.higher_set_indicators
+            previous_n = int(ns[i])
+        return result
@@ -9,7 +9,8 @@ def plot_simu_and_theo(
     ns_equivalent_probas=None, ns_monte_carlo_probas=None, ns_exact_probas=None,
     label_equivalent="Theoretical equivalent", label_monte_carlo="Monte-Carlo results", label_exact="Exact results",
     x_label="Number of voters $n$", y_label=r"$\mathbb{P}(m \text{ is CW})$",
-    log_scale=False, xmax=None, legend_loc=None, verbose=True, file_name=None
+    log_scale=False, xmax=None, legend_loc=None, verbose=True, file_name=None,
+    upper_bound_probas=None, ns_upper_bound_probas=None, label_upper_bound="Chernoff upper bound"
 ):
     """
     Plot the theoretical, Monte-Carlo and exact probabilities of the Condorcet winner as functions of n.
@@ -48,6 +49,12 @@ def plot_simu_and_theo(
         Whether to print the data.
     file_name
         If not None, the plot is saved in a file with this name, using tikzplotlib.
+    upper_bound_probas: list of floats
+        Values of the upper bound for each n in `ns_upper_bound_probas`, e.g. computed by :func:`upper_bound_batch`.
+    ns_upper_bound_probas: list of ints
+        Values of n for which the upper bound has been computed.
+    label_upper_bound: str
+        Label for the upper bound in the plot.
     """
     if equivalent_probas is not None:
         plt.plot(ns_equivalent_probas, equivalent_probas, label=label_equivalent)
@@ -61,6 +68,12 @@ def plot_simu_and_theo(
         if verbose:
             print(f"{d_n_exact_proba=}")
 
+    if upper_bound_probas is not None:
+        plt.plot(ns_upper_bound_probas, upper_bound_probas, label=label_upper_bound, linestyle='--')
+        d_n_upper_bound = {k: v for k, v in zip(ns_upper_bound_probas, upper_bound_probas)}
+        if verbose:
+            print(f"{d_n_upper_bound=}")
+
     if monte_carlo_probas is not None:
         if log_scale:
             indices = np.where(np.array(monte_carlo_probas)  > 0)[0]
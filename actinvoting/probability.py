@@ -0,0 +1,171 @@
+import numpy as np
+
+from actinvoting.util_time import current_time, elapsed_time
+
+# Rough time of one multiply-add in the dynamic program of the exact computation, in seconds.
+_SECONDS_PER_OPERATION = 2e-9
+# Maximal number of cells in the table of the exact computation (8 bytes each).
+_MAX_N_STATES = 10**8
+# Number of samples of the pilot runs of importance sampling.
+_N_PILOT_SAMPLES = 1000
+# Factor applied to the calibrated error of the theoretical equivalent.
+_SAFETY_FACTOR = 2.
+
+
+def probability(session, ns, tolerance, time_budget=60., seed=None):
+    """
+    The probability that c is an alpha-winner, for a list of values of n, with an automatic choice of the method.
+
+    For each n, four methods are considered, with an estimation of their cost and of their absolute error:
+
+    * "upper_bound": the Chernoff upper bound (cf. :meth:`WorkSession.upper_bound_many`). It is free and its error
+      is at most its own value, so it is used whenever it is below `tolerance`.
+    * "equivalent": the theoretical equivalent (cf. :meth:`WorkSession.equivalent_many`), which is free, but not
+      defined in supercritical cases. Its relative error is of order C / n if all the adversaries are subcritical,
+      and C / sqrt(n) otherwise. The constant C is calibrated with exact computations for a few small values of n
+      (powers of 2), whose cost is limited to 5% of `time_budget`.
+    * "exact": the exact probability (cf. :meth:`WorkSession.exact_probabilities`), whose error is negligible. The cost
+      is estimated as n times the number of nonzero coefficients of the characteristic polynomial times the size of
+      the table of the dynamic program, i.e. prod_j ceil(beta[j] n).
+    * "monte_carlo": importance sampling (cf. :meth:`WorkSession.importance_sampling`). A pilot run of 1000 samples
+      gives the time per sample and the standard deviation of the estimator, from which we deduce the number of
+      samples needed to reach a standard error equal to `tolerance`.
+
+    Each n is dispatched to the cheapest method that meets `tolerance` within the remaining time budget (the most
+    accurate one in case of a tie). If there is none, we use the most accurate method among those that fit in the
+    remaining time budget (for Monte Carlo, with a fair share of the remaining budget). The free methods always fit,
+    even if the budget is exhausted.
+
+    Parameters
+    ----------
+    session: WorkSession
+        The working session specifying the culture and the parameters of the model.
+    ns: list of int
+        The values of n (number of voters).
+    tolerance: float
+        The target absolute error.
+    time_budget: float
+        The total time budget, in seconds. The costs are only estimations, so it is not a hard limit.
+    seed: int
+        Random seed for Monte Carlo.
+
+    Returns
+    -------
+    list of dict
+        For each value in `ns`, a record with the keys "n", "method" (cf. above), "value" (the estimation of the
+        probability), "error" (the estimation of the absolute error, or the standard error for "monte_carlo") and
+        "estimated_time" (in seconds).
+
+    Examples
+    --------
+        >>> import sympy
+        >>> from actinvoting.cultures.culture_mallows import CultureMallows
+        >>> from actinvoting.work_session import WorkSession
+        >>> session = WorkSession(culture=CultureMallows(m=3, phi=sympy.Rational(1, 2)), c=2)
+        >>> records = probability(session, ns=[10, 1000, 10**6], tolerance=1e-6, time_budget=10., seed=42)
+        >>> [record["method"] for record in records]
+        ['exact', 'equivalent', 'upper_bound']
+        >>> print(f"{records[0]['value']:.6f}")
+        0.004440
+
+    Without time budget, only the free methods are used:
+
+        >>> records = probability(session, ns=[10, 50], tolerance=1e-12, time_budget=0., seed=42)
+        >>> [record["method"] for record in records]
+        ['equivalent', 'equivalent']
+    """
+    start_time = current_time()
+    ns = [int(n) for n in ns]
+    rng = np.random.default_rng(seed)
+    upper_bounds = session.upper_bound_many(ns)
+    exact_costs = [_exact_cost(session, n) for n in ns]
+    supercritical = session.n_subcritical_candidates + session.n_critical_candidates < session.m - 1
+    if not supercritical:
+        equivalents = session.equivalent_many(ns)
+        relative_errors = _equivalent_relative_errors(session, ns, time_budget / 20)
+    remaining_time = time_budget - elapsed_time(start_time)[0]
+
+    records = []
+    for i, n in enumerate(ns):
+        # Options: method -> (value, error, cost, n_samples).
+        options = {"upper_bound": (upper_bounds[i], upper_bounds[i], 0., None)}
+        if not supercritical:
+            options["equivalent"] = (equivalents[i], equivalents[i] * relative_errors[i], 0., None)
+        options["exact"] = (None, 0., exact_costs[i], None)
+        if upper_bounds[i] >= tolerance:
+            pilot_start_time = current_time()
+            _, pilot_error = session.importance_sampling(
+                n, _N_PILOT_SAMPLES, seed=int(rng.integers(2**32)))
+            time_per_sample = elapsed_time(pilot_start_time)[0] / _N_PILOT_SAMPLES
+            remaining_time -= time_per_sample * _N_PILOT_SAMPLES
+            n_samples = max(int(np.ceil(_N_PILOT_SAMPLES * (pilot_error / tolerance) ** 2)), _N_PILOT_SAMPLES)
+            options["monte_carlo"] = (None, tolerance, n_samples * time_per_sample, n_samples)
+            affordable_n_samples = int(max(remaining_time, 0.) / (len(ns) - i) / time_per_sample)
+            if n_samples > affordable_n_samples > _N_PILOT_SAMPLES:
+                options["monte_carlo_capped"] = (
+                    None, pilot_error * np.sqrt(_N_PILOT_SAMPLES / affordable_n_samples),
+                    affordable_n_samples * time_per_sample, affordable_n_samples)
+        # The free options are always affordable, even when the calibration and the pilot runs exceeded the budget.
+        affordable = {method: option for method, option in options.items() if option[2] <= max(remaining_time, 0.)}
+        meeting_tolerance = {method: option for method, option in affordable.items() if option[1] <= tolerance}
+        if meeting_tolerance:
+            method = min(meeting_tolerance, key=lambda method: (meeting_tolerance[method][2],
+                                                                meeting_tolerance[method][1]))
+        else:
+            method = min(affordable, key=lambda method: affordable[method][1])
+        value, error, cost, n_samples = options[method]
+        remaining_time -= cost
+        records.append({"n": n, "method": method.replace("_capped", ""), "value": value, "error": error,
+                        "estimated_time": cost, "n_samples": n_samples})
+
+    # The exact computations are done in a single pass.
+    ns_exact = [record["n"] for record in records if record["method"] == "exact"]
+    d_n_exact = dict(zip(ns_exact, session.exact_probabilities(ns_exact))) if ns_exact else {}
+    for record in records:
+        n_samples = record.pop("n_samples")
+        if record["method"] == "exact":
+            record["value"] = d_n_exact[record["n"]]
+        elif record["method"] == "monte_carlo":
+            record["value"], record["error"] = session.importance_sampling(
+                record["n"], n_samples, seed=int(rng.integers(2**32)))
+        record["value"] = float(record["value"])
+        record["error"] = float(record["error"])
+        record["estimated_time"] = float(record["estimated_time"])
+    return records
+
+
+def _exact_cost(session, n):
+    """
+    Estimated time of the exact computation, in seconds (inf if the table does not fit in memory).
+    """
+    max_counts = session.max_counts(n)
+    if np.any(max_counts < 0):
+        return 0.
+    n_states = float(np.prod(np.minimum(max_counts, n) + 1, dtype=float))
+    if n_states > _MAX_N_STATES:
+        return np.inf
+    n_terms = np.count_nonzero(session.characteristic_coefficients_as_floats)
+    return n * n_terms * n_states * _SECONDS_PER_OPERATION
+
+
+def _equivalent_relative_errors(session, ns, calibration_budget):
+    """
+    Estimated relative errors of the theoretical equivalent, calibrated with exact values for small n.
+    """
+    exponent = 1. if session.n_subcritical_candidates == session.m - 1 else .5
+    ns_calibration = []
+    n = 8
+    # The single pass up to n costs less than twice the cost for n alone.
+    while 2 * _exact_cost(session, n) <= calibration_budget and n <= max(ns):
+        ns_calibration.append(n)
+        n *= 2
+    constant = float(session.m - 1)
+    if ns_calibration:
+        exacts = np.array(session.exact_probabilities(ns_calibration))
+        equivalents = session.equivalent_many(ns_calibration)
+        positive = exacts > 0
+        if np.any(positive):
+            constant = _SAFETY_FACTOR * np.max(
+                np.abs(equivalents[positive] / exacts[positive] - 1)
+                * np.array(ns_calibration, dtype=float)[positive] ** exponent)
+    return constant / np.array(ns, dtype=float) ** exponent
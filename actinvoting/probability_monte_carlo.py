@@ -1,7 +1,10 @@
 import numpy as np
 
+from actinvoting.util_confidence import confidence_interval, half_width_reached
 
-def probability_monte_carlo(factory, n_samples, test, conditional_on=None):
+
+def probability_monte_carlo(factory, n_samples, test, conditional_on=None, batch_size=None, interval=None,
+                            confidence_level=.95, half_width=None, relative=False, max_samples=None):
     """Probability that a random `something` meets some given test.
 
     Parameters
@@ -21,16 +24,39 @@ def probability_monte_carlo(factory, n_samples, test, conditional_on=None):
     conditional_on : callable
         A function that take as input(s) the output(s) of the factory(ies) and that returns a Boolean.
         Default: always True.
+    batch_size : int, optional
+        If specified, the samples are drawn by batches of (at most) this size, in order to avoid the overhead of the
+        Python interpreter for each sample. Then each factory takes as input a number of samples k and returns a batch
+        of k samples (e.g. a :class:`ProfileBatch` or an array whose first axis has size k), each test returns a
+        Boolean array of size k, and `conditional_on` returns a Boolean mask of size k. The semantics is the same:
+        exactly `n_samples` samples meeting `conditional_on` are used.
+    interval : str, optional
+        If specified, a confidence interval is returned along with each probability. It can be "wilson" or
+        "clopper_pearson", cf. :func:`confidence_interval`.
+    confidence_level : float
+        The confidence level of the intervals.
+    half_width : float, optional
+        If specified, the estimation is sequential: after each round of `n_samples` samples, the sampling stops if the
+        half-width of the confidence interval (by default, the Wilson interval) is at most `half_width`, for each
+        test. Since the number of samples depends on the results, the coverage of the intervals is only approximate.
+    relative : bool
+        If True, `half_width` is relative to the estimated probability (so the sampling never stops early if no
+        success has been observed).
+    max_samples : int, optional
+        In sequential mode, the maximal total number of samples. Default: 100 times `n_samples`.
 
     Returns
     -------
-    float or tuple of float
+    float or tuple
         This can be:
 
         * Either the probability that the output(s) generated by `factory` meet(s) `test`, conditional on the fact
           that it meets `conditional_on`, based on a Monte-Carlo estimation of `n_samples` trials.
         * Or a tuple giving this probability for each member of `test`, when `test` is a tuple itself.
 
+        If `interval` or `half_width` is specified, each probability is replaced by a tuple (probability, lower
+        bound, upper bound).
+
     Examples
     --------
     In this basic example with one factory, we estimate the probability that a random float between 0 and 1 is greater
@@ -71,12 +97,63 @@ def probability_monte_carlo(factory, n_samples, test, conditional_on=None):
         (0.657, 0.342)
 
     When using a tuple of tests, the same sample is used to estimate each probability.
+
+    In the batched mode, the previous example becomes:
+
+        >>> rng = np.random.default_rng(0)
+        >>> def rand_numbers(k):
+        ...     return rng.random(k)
+        >>> probability_monte_carlo(factory=rand_numbers, n_samples=100000, batch_size=10000,
+        ...                         test=(lambda x: x > .5, lambda x: x > .75), conditional_on=lambda x: x > .25)
+        (0.66497, 0.33177)
+
+    With `interval`, we also get a confidence interval. With `half_width`, the sampling goes on until the interval is
+    narrow enough:
+
+        >>> np.random.seed(0)
+        >>> p, lower, upper = probability_monte_carlo(factory=rand_number, n_samples=1000, test=lambda x: x > .5,
+        ...                                           interval="wilson", half_width=.01)
+        >>> print(f"{p:.4f} [{lower:.4f}, {upper:.4f}]")
+        0.4936 [0.4838, 0.5034]
     """
     if not isinstance(factory, tuple):
         factory = (factory,)
     is_test_tuple = isinstance(test, tuple)
     if not is_test_tuple:
         test = (test,)
+
+    def count_successes(size):
+        if batch_size is None:
+            return _count_successes(factory, size, test, conditional_on)
+        return _count_successes_batched(factory, size, test, conditional_on, batch_size)
+
+    l_test_success = np.array(count_successes(n_samples), dtype=np.int64)
+    n_done = n_samples
+    if half_width is not None:
+        if interval is None:
+            interval = "wilson"
+        if max_samples is None:
+            max_samples = 100 * n_samples
+        while n_done < max_samples:
+            if half_width_reached(l_test_success, n_done, half_width, relative, interval, confidence_level):
+                break
+            size = min(n_samples, max_samples - n_done)
+            l_test_success += count_successes(size)
+            n_done += size
+    l_test_rate = [int(successes) / n_done for successes in l_test_success]
+    if interval is not None:
+        lower, upper = confidence_interval(l_test_success, n_done, interval, confidence_level)
+        l_test_rate = [(rate, float(low), float(high)) for rate, low, high in zip(l_test_rate, lower, upper)]
+    if is_test_tuple:
+        return tuple(l_test_rate)
+    else:
+        return l_test_rate[0]
+
+
+def _count_successes(factory, n_samples, test, conditional_on):
+    """
+    Numbers of successes of each test, drawing the samples one by one.
+    """
     l_test_success = [0 for _ in test]
     i_samples = 0
     while i_samples < n_samples:
@@ -86,8 +163,24 @@ def probability_monte_carlo(factory, n_samples, test, conditional_on=None):
             for i_test, the_test in enumerate(test):
                 if the_test(*somethings):
                     l_test_success[i_test] += 1
-    l_test_rate = [successes / n_samples for successes in l_test_success]
-    if is_test_tuple:
-        return tuple(l_test_rate)
-    else:
-        return l_test_rate[0]
+    return l_test_success
+
+
+def _count_successes_batched(factory, n_samples, test, conditional_on, batch_size):
+    """
+    Numbers of successes of each test, drawing the samples by batches.
+    """
+    l_test_success = [0 for _ in test]
+    i_samples = 0
+    while i_samples < n_samples:
+        size = min(batch_size, n_samples - i_samples)
+        batches = [f(size) for f in factory]
+        if conditional_on is None:
+            indices = np.arange(size)
+        else:
+            # Only the first accepted samples are used, so that exactly `n_samples` samples are accepted in the end.
+            indices = np.flatnonzero(conditional_on(*batches))[:n_samples - i_samples]
+        i_samples += len(indices)
+        for i_test, the_test in enumerate(test):
+            l_test_success[i_test] += int(np.count_nonzero(np.asarray(the_test(*batches))[indices]))
+    return l_test_success
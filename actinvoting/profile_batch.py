@@ -0,0 +1,107 @@
+import numpy as np
+
+from actinvoting.util_cache import cached_property
+
+
+class ProfileBatch:
+    """
+    A batch of voting profiles, with the same number of candidates.
+
+    Only the weighted majority matrices of the profiles are stored, so that the properties related to the Condorcet
+    winner are computed for the whole batch at once, as arrays whose first axis is indexed by the profiles.
+
+    Parameters
+    ----------
+    weighted_majority_matrices: ndarray
+        Array of shape (size, m, m). Element (k, c, d) is the number of voters who prefer candidate `c` to candidate
+        `d` in profile k.
+
+    Examples
+    --------
+        >>> from actinvoting.profile import Profile
+        >>> batch = ProfileBatch.from_profiles([
+        ...     Profile.from_d_ranking_multiplicity({(0, 1, 2): 3, (1, 0, 2): 2}),
+        ...     Profile.from_d_ranking_multiplicity({(0, 1, 2): 1, (1, 2, 0): 1, (2, 0, 1): 1}),
+        ... ])
+        >>> batch.size, batch.m
+        (2, 3)
+        >>> batch.is_condorcet_winner
+        array([[ True, False, False],
+               [False, False, False]])
+        >>> batch.exists_condorcet_winner
+        array([ True, False])
+    """
+
+    def __init__(self, weighted_majority_matrices):
+        self.weighted_majority_matrices = np.array(weighted_majority_matrices)
+
+    @classmethod
+    def from_profiles(cls, profiles):
+        """
+        Batch from a list of profiles.
+
+        Parameters
+        ----------
+        profiles: list of Profile
+            The profiles.
+
+        Returns
+        -------
+        ProfileBatch
+            The batch of these profiles.
+        """
+        return cls(np.array([profile.weighted_majority_matrix for profile in profiles]))
+
+    @cached_property
+    def size(self):
+        """
+        int: Number of profiles.
+        """
+        return self.weighted_majority_matrices.shape[0]
+
+    @cached_property
+    def m(self):
+        """
+        int: Number of candidates.
+        """
+        return self.weighted_majority_matrices.shape[1]
+
+    @cached_property
+    def majority_matrix(self):
+        """
+        ndarray: Majority matrices, of shape (size, m, m), cf. :attr:`Profile.majority_matrix`.
+        """
+        wmm = self.weighted_majority_matrices
+        wmm_transposed = np.swapaxes(wmm, 1, 2)
+        mm = (wmm > wmm_transposed) + .5 * (wmm == wmm_transposed)
+        mm[:, np.arange(self.m), np.arange(self.m)] = 0.
+        return mm
+
+    @cached_property
+    def is_condorcet_winner(self):
+        """
+        ndarray: Array of shape (size, m). Element (k, c) is True if `c` is the Condorcet winner of profile k.
+        """
+        return np.all(self.majority_matrix == 0, 1)
+
+    @cached_property
+    def exists_condorcet_winner(self):
+        """
+        ndarray: Array of size `size`. Element k is True if there exists a Condorcet winner in profile k.
+        """
+        return np.any(self.is_condorcet_winner, 1)
+
+    @cached_property
+    def is_weak_condorcet_winner(self):
+        """
+        ndarray: Array of shape (size, m). Element (k, c) is True if `c` is a weak Condorcet winner of profile k.
+        """
+        return np.all(self.majority_matrix <= .5, 1)
+
+    @cached_property
+    def exists_condorcet_order(self):
+        """
+        ndarray: Array of size `size`. Element k is True if the majority relation of profile k is transitive.
+        """
+        scores = np.sort(self.majority_matrix.sum(axis=2), axis=1)
+        return np.all(np.diff(scores, axis=1) != 0, axis=1)
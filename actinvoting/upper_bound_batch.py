@@ -0,0 +1,54 @@
+import pickle
+
+from actinvoting.util_time import current_time, elapsed_time
+
+
+def upper_bound_batch(session, ns, file_name=None, force_recompute=False):
+    """
+    Compute the Chernoff upper bounds for a list of values of n.
+
+    Parameters
+    ----------
+    session: WorkingSession
+        The working session specifying the culture and the parameters of the model.
+    ns: list of int
+        The list of values of n (number of voters) for which the values of the upper bound are to be computed.
+    file_name: str
+        The name of the file where the result is saved. If None, the file name is automatically generated.
+    force_recompute: bool
+        If True, the computation is done even if the file already exists.
+
+    Returns
+    -------
+    list of float
+        The list of upper bounds for the values of n in the input list, cf. :meth:`WorkSession.upper_bound_many`.
+    """
+    # Default parameters
+    culture = session.culture
+    c = session.c
+    if file_name is None:
+        file_name = (str(culture) + f"_{c=}_{ns=}_bound").\
+                        replace(' ', '_').replace('/', '_') + '.pkl'
+    if len(file_name) >= 255:
+        file_name = (str(culture) + f"_{c=}_hash(ns)={hash(tuple(ns))}_bound").\
+                        replace(' ', '_').replace('/', '_') + '.pkl'
+
+    # Try to load the file
+    if not force_recompute:
+        try:
+            with open(file_name, 'rb') as f:
+                print(f"Loading {file_name}")
+                return pickle.load(f)
+        except FileNotFoundError:
+            pass
+
+    # Run the vectorized function
+    start_time = current_time()
+    result = [float(p) for p in session.upper_bound_many(ns)]
+    run_time_seconds, run_time_str = elapsed_time(start_time)
+    print(f'{run_time_str=}')
+
+    # Create the file if it does not exist, then save the result in the file
+    with open(file_name, 'wb') as f:
+        pickle.dump(result, f)
+    return result
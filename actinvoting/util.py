@@ -109,3 +109,40 @@ def kendall_tau_id_borda(borda):
     borda = np.array(borda)
     m = len(borda)
     return (borda[:, np.newaxis] < borda[np.newaxis, :])[np.triu_indices(m)].sum()
+
+
+def max_counts_of_thresholds(beta_numerators, beta_denominators, ns):
+    """
+    The largest integers that are less than beta[j] n, for rational thresholds beta[j].
+
+    Parameters
+    ----------
+    beta_numerators: list of int
+        The numerators of the thresholds beta[j].
+    beta_denominators: list of int
+        The (positive) denominators of the thresholds beta[j].
+    ns: list of int
+        The numbers of voters.
+
+    Returns
+    -------
+    ndarray
+        Array of shape (len(ns), len(beta_numerators)). Element (i, j) is ceil(beta[j] ns[i]) - 1, computed exactly.
+
+    Examples
+    --------
+        >>> max_counts_of_thresholds([1, 2], [2, 3], [1, 2, 3, 10**12])
+        array([[           0,            0],
+               [           0,            1],
+               [           1,            1],
+               [499999999999, 666666666666]])
+    """
+    ns = np.array(ns, dtype=np.int64).ravel()
+    result = np.zeros((len(ns), len(beta_numerators)), dtype=np.int64)
+    for i, (p, q) in enumerate(zip(beta_numerators, beta_denominators)):
+        if q <= 2**31 and abs(p) <= 2**31 and np.all(ns < 2**31):
+            # Exact integer arithmetic: ceil(p n / q) = -((-p n) // q).
+            result[:, i] = -((-p * ns) // q) - 1
+        else:
+            result[:, i] = [-((-p * int(n)) // q) - 1 for n in ns]
+    return result
@@ -0,0 +1,92 @@
+import numpy as np
+from scipy.stats import beta, norm
+
+
+def confidence_interval(successes, n_samples, method="wilson", confidence_level=.95):
+    """
+    Confidence interval of a probability, estimated by a success rate.
+
+    Parameters
+    ----------
+    successes: int or ndarray
+        The number(s) of successes.
+    n_samples: int or ndarray
+        The number(s) of samples.
+    method: str
+        "wilson" for the Wilson score interval, or "clopper_pearson" for the Clopper-Pearson interval, which is exact
+        (i.e. its coverage is at least `confidence_level`) but more conservative.
+    confidence_level: float
+        The confidence level.
+
+    Returns
+    -------
+    tuple
+        The lower and upper bounds of the interval (floats, or arrays if the inputs are arrays).
+
+    Examples
+    --------
+        >>> lower, upper = confidence_interval(5, 100)
+        >>> print(f"{lower:.4f} {upper:.4f}")
+        0.0215 0.1118
+        >>> lower, upper = confidence_interval(5, 100, method="clopper_pearson")
+        >>> print(f"{lower:.4f} {upper:.4f}")
+        0.0164 0.1128
+        >>> lower, upper = confidence_interval(0, 100, method="clopper_pearson")
+        >>> print(f"{lower:.4f} {upper:.4f}")
+        0.0000 0.0362
+    """
+    successes = np.asarray(successes, dtype=float)
+    n_samples = np.asarray(n_samples, dtype=float)
+    risk = 1 - confidence_level
+    if method == "wilson":
+        z = norm.ppf(1 - risk / 2)
+        rate = successes / n_samples
+        denominator = 1 + z ** 2 / n_samples
+        center = (rate + z ** 2 / (2 * n_samples)) / denominator
+        half_width = z / denominator * np.sqrt(rate * (1 - rate) / n_samples + z ** 2 / (4 * n_samples ** 2))
+        lower, upper = np.maximum(center - half_width, 0.), np.minimum(center + half_width, 1.)
+    elif method == "clopper_pearson":
+        with np.errstate(invalid='ignore'):
+            lower = np.where(successes > 0, beta.ppf(risk / 2, successes, n_samples - successes + 1), 0.)
+            upper = np.where(successes < n_samples, beta.ppf(1 - risk / 2, successes + 1, n_samples - successes), 1.)
+    else:
+        raise ValueError(f"Unknown method: {method}.")
+    if lower.ndim == 0:
+        return float(lower), float(upper)
+    return lower, upper
+
+
+def half_width_reached(successes, n_samples, half_width, relative=False, method="wilson", confidence_level=.95):
+    """
+    Whether the confidence intervals are narrow enough, which is the stopping rule of sequential Monte Carlo.
+
+    Parameters
+    ----------
+    successes: int or ndarray
+        The number(s) of successes.
+    n_samples: int or ndarray
+        The number(s) of samples.
+    half_width: float
+        The target half-width of the intervals.
+    relative: bool
+        If True, `half_width` is relative to the success rate.
+    method: str
+        The method of the intervals, cf. :func:`confidence_interval`.
+    confidence_level: float
+        The confidence level.
+
+    Returns
+    -------
+    bool
+        True if the half-width of each interval is at most the target.
+
+    Examples
+    --------
+        >>> half_width_reached([500, 10], 10000, half_width=.005)
+        True
+        >>> half_width_reached([500, 10], 10000, half_width=.5, relative=True)
+        False
+    """
+    lower, upper = confidence_interval(successes, n_samples, method, confidence_level)
+    target = half_width * np.asarray(successes) / np.asarray(n_samples) if relative else half_width
+    return bool(np.all((np.asarray(upper) - np.asarray(lower)) / 2 <= target))
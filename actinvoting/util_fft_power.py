@@ -0,0 +1,84 @@
+import numpy as np
+from scipy import fft
+from scipy.special import logsumexp
+from scipy.stats import binom
+
+
+def fft_power_log_sum(coefficients, tau, n, max_counts):
+    """
+    Logarithm of the sum of the truncated coefficients of the power of a multilinear polynomial, computed by FFT.
+
+    Let P be a multilinear polynomial with nonnegative coefficients. We compute the sum of the coefficients of P^n
+    whose exponents are at most `max_counts`.
+
+    To control the rounding errors, P is first exponentially tilted: Q(x) = P(e^tau x) / P(e^tau). When tau is the
+    log saddle point, the mass of Q^n is concentrated around the thresholds, so that the coefficients we need are
+    not negligible compared to the largest ones. Then Q^n is computed with a single multidimensional FFT of size
+    L_1 * ... * L_d, where L_j is chosen so that the mass of Q^n with an exponent x_j >= L_j (which is aliased by the
+    circular convolution) is below the machine precision. Since under Q, the exponent of x_j in Q^n follows a binomial
+    distribution, this mass is bounded rigorously by a binomial tail.
+
+    Parameters
+    ----------
+    coefficients: ndarray
+        Coefficients of the multilinear polynomial P, of shape (2, ..., 2) (d times).
+    tau: list of float
+        The tilting parameter, of size d. Typically, the log saddle point.
+    n: int
+        The exponent.
+    max_counts: list of int
+        For each variable, the maximal exponent to keep. They must be nonnegative.
+
+    Returns
+    -------
+    tuple of float
+        The logarithm of the sum, and the logarithm of a bound on the absolute error. The error bound is the sum of
+        the aliasing bound (rigorous) and an a priori bound on the rounding errors of the FFT (in (n + 1) *
+        (log_2(L_1 ... L_d) + 1) machine epsilons, relatively to the total mass of the tilted polynomial).
+
+    Examples
+    --------
+        >>> coefficients = np.array([[.25, .25], [.25, .25]])  # (1 + x)(1 + y) / 4
+        >>> log_sum, log_error = fft_power_log_sum(coefficients, tau=[0., 0.], n=2, max_counts=[0, 1])
+        >>> print(f'{np.exp(log_sum):.6f}')
+        0.187500
+        >>> bool(np.exp(log_error) < 1e-12)
+        True
+    """
+    tau = np.array(tau, dtype=float)
+    max_counts = np.array(max_counts, dtype=int)
+    d = coefficients.ndim
+    masks = np.array(list(np.ndindex(coefficients.shape)), dtype=float).reshape(-1, d)
+    with np.errstate(divide='ignore'):
+        log_tilted = np.log(coefficients.ravel()) + masks @ tau
+    log_p_of_zeta = logsumexp(log_tilted)
+    tilted = np.exp(log_tilted - log_p_of_zeta).reshape(coefficients.shape)
+    means = np.clip(masks.T @ tilted.ravel(), 0., 1.)
+    # Choose the sizes so that the aliased mass is below the machine precision.
+    eps = np.finfo(float).eps
+    sizes = []
+    aliasing_bound = 0.
+    for mean, max_count in zip(means, max_counts):
+        size = max_count + 1
+        while size <= n and binom.sf(size - 1, n, mean) > eps:
+            size += max(1, size // 8)
+        size = min(fft.next_fast_len(int(size), real=True), n + 1)
+        sizes.append(size)
+        aliasing_bound += binom.sf(size - 1, n, mean) if size <= n else 0.
+    tilted_power = fft.irfftn(fft.rfftn(tilted, s=sizes) ** n, s=sizes)
+    tilted_power = tilted_power[tuple(slice(0, k + 1) for k in max_counts)]
+    # Weights e^(-tau . k), normalized so that the largest one is 1.
+    shift = np.sum(np.maximum(-tau * max_counts, 0.))
+    weights = np.ones((1, ) * d)
+    log_sum_weights = 0.
+    for j in range(d):
+        log_weights_j = -tau[j] * np.arange(max_counts[j] + 1) - max(-tau[j] * max_counts[j], 0.)
+        shape = [1] * d
+        shape[j] = max_counts[j] + 1
+        weights = weights * np.exp(log_weights_j).reshape(shape)
+        log_sum_weights += logsumexp(log_weights_j)
+    total = np.sum(tilted_power * weights)
+    rounding_bound = (n + 1) * (np.log2(np.prod(sizes, dtype=float)) + 1) * eps * np.exp(log_sum_weights)
+    log_scale = n * log_p_of_zeta + shift
+    with np.errstate(divide='ignore'):
+        return float(log_scale + np.log(max(total, 0.))), float(log_scale + np.log(aliasing_bound + rounding_bound))
@@ -0,0 +1,169 @@
+import numpy as np
+from scipy.integrate import quad
+from scipy.special import log_ndtr, ndtr, ndtri
+from scipy.stats import qmc
+
+
+def orthant_probability(covariance, abs_tol=1e-6, rel_tol=1e-4, n_samples=1024, max_samples=2**20, n_batches=8,
+                        seed=None):
+    """
+    Probability that a centered Gaussian vector lies in the positive orthant.
+
+    In dimensions 1 to 3, closed forms are used. In higher dimensions, we use the separation-of-variables algorithm
+    by Genz, with randomized quasi-Monte Carlo integration (scrambled Sobol sequences). The number of points is doubled
+    until the estimated error meets the tolerance or the maximal number of samples is reached.
+
+    Parameters
+    ----------
+    covariance: ndarray
+        The covariance matrix of the Gaussian vector X, of size k * k.
+    abs_tol: float
+        Absolute tolerance on the error.
+    rel_tol: float
+        Relative tolerance on the error.
+    n_samples: int
+        Initial number of quasi-Monte Carlo points per batch. It should be a power of 2.
+    max_samples: int
+        Maximal total number of quasi-Monte Carlo points (over all batches).
+    n_batches: int
+        Number of independent randomizations, used to estimate the error.
+    seed: int
+        Random seed.
+
+    Returns
+    -------
+    tuple of float
+        The probability P(X >= 0), along with the estimated absolute error (3 standard errors of the randomized
+        estimator, 0 for closed forms).
+
+    Examples
+    --------
+    For an equicorrelated vector with correlation 1/2, the probability is 1 / (k + 1):
+
+        >>> proba, error = orthant_probability([[1, .5], [.5, 1]])
+        >>> print(f'{proba:.4f}')
+        0.3333
+        >>> error
+        0
+        >>> covariance = np.full((4, 4), .5) + .5 * np.eye(4)
+        >>> proba, error = orthant_probability(covariance, seed=42)
+        >>> print(f'{proba:.4f}')
+        0.2000
+        >>> bool(error < 1e-4)
+        True
+
+    References
+    ----------
+    Genz, A. (1992). Numerical computation of multivariate normal probabilities. Journal of Computational and
+    Graphical Statistics, 1(2), 141-149.
+    """
+    covariance = np.atleast_2d(np.array(covariance, dtype=float))
+    k = covariance.shape[0]
+    if k == 0:
+        return 1., 0
+    std = np.sqrt(np.diag(covariance))
+    correlation = covariance / np.outer(std, std)
+    if k == 1:
+        return .5, 0
+    if k == 2:
+        return float(1 / 4 + np.arcsin(correlation[0, 1]) / (2 * np.pi)), 0
+    if k == 3:
+        return float(1 / 8 + (
+            np.arcsin(correlation[0, 1]) + np.arcsin(correlation[0, 2]) + np.arcsin(correlation[1, 2])
+        ) / (4 * np.pi)), 0
+    # By symmetry, P(X >= 0) = P(X <= 0), which is the standard form of Genz's algorithm with an upper limit.
+    cholesky = np.linalg.cholesky(correlation)
+    rng = np.random.default_rng(seed)
+    tiny = np.finfo(float).tiny
+    while True:
+        batch_estimates = []
+        for _ in range(n_batches):
+            sobol = qmc.Sobol(d=k - 1, scramble=True, seed=rng)
+            w = sobol.random(n_samples)
+            y = np.zeros((n_samples, k))
+            e = np.full(n_samples, .5)
+            f = e.copy()
+            for i in range(1, k):
+                y[:, i - 1] = ndtri(np.clip(w[:, i - 1] * e, tiny, 1 - tiny))
+                s = y[:, :i] @ cholesky[i, :i]
+                e = ndtr(-s / cholesky[i, i])
+                f *= e
+            batch_estimates.append(f.mean())
+        proba = float(np.mean(batch_estimates))
+        error = float(3 * np.std(batch_estimates, ddof=1) / np.sqrt(n_batches))
+        if error <= max(abs_tol, rel_tol * proba) or 2 * n_samples * n_batches > max_samples:
+            return proba, error
+        n_samples *= 2
+
+
+def orthant_integral_of_gaussian(matrix, **kwargs):
+    """
+    Integral of exp(-u^T M u / 2) over the positive orthant.
+
+    It is equal to (2 pi)^(k/2) / sqrt(det(M)) times the probability that a centered Gaussian vector of covariance
+    M^(-1) lies in the positive orthant, where k is the dimension. The latter is computed by
+    :func:`orthant_probability`.
+
+    Parameters
+    ----------
+    matrix: ndarray
+        The positive definite matrix M, of size k * k.
+    kwargs
+        Keyword arguments passed to :func:`orthant_probability`.
+
+    Returns
+    -------
+    tuple of float
+        The integral, along with the estimated absolute error.
+
+    Examples
+    --------
+        >>> integral, error = orthant_integral_of_gaussian(np.eye(2))
+        >>> print(f'{integral:.6f} {np.pi / 2:.6f}')
+        1.570796 1.570796
+    """
+    matrix = np.atleast_2d(np.array(matrix, dtype=float))
+    k = matrix.shape[0]
+    if k == 0:
+        return 1, 0
+    factor = (2 * np.pi) ** (k / 2) / np.sqrt(np.linalg.det(matrix))
+    proba, error = orthant_probability(np.linalg.inv(matrix), **kwargs)
+    return float(factor * proba), float(factor * error)
+
+
+def orthant_probability_equicorrelated(k, rho):
+    """
+    Probability that a centered equicorrelated Gaussian vector lies in the positive orthant.
+
+    For a correlation rho >= 0, we can write X_j = sqrt(rho) Z + sqrt(1 - rho) Z_j, where Z, Z_1, ..., Z_k are
+    independent standard Gaussian variables. Conditionally on Z, the events X_j >= 0 are independent, hence the
+    probability is the one-dimensional integral of phi(z) Phi(z sqrt(rho / (1 - rho)))^k.
+
+    Parameters
+    ----------
+    k: int
+        The dimension.
+    rho: float
+        The correlation between any two coordinates. It must be in [0, 1).
+
+    Returns
+    -------
+    tuple of float
+        The probability P(X >= 0), along with the estimated absolute error of the numerical integration.
+
+    Examples
+    --------
+        >>> proba, error = orthant_probability_equicorrelated(4, .5)  # 1 / (k + 1)
+        >>> print(f'{proba:.10f}')
+        0.2000000000
+        >>> bool(error < 1e-10)
+        True
+    """
+    if k == 0:
+        return 1., 0.
+    slope = np.sqrt(rho / (1 - rho))
+
+    def f(z):
+        return np.exp(-z ** 2 / 2 + k * log_ndtr(slope * z)) / np.sqrt(2 * np.pi)
+    proba, error = quad(f, -np.inf, np.inf, epsabs=1e-13, epsrel=1e-12)
+    return float(proba), float(error)
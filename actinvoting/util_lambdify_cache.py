@@ -0,0 +1,136 @@
+import hashlib
+import json
+import os
+
+import numpy as np
+import sympy
+from sympy.printing.numpy import NumPyPrinter
+
+
+def fingerprint_of_expression(expression):
+    """
+    Fingerprint of a sympy expression.
+
+    Parameters
+    ----------
+    expression: sympy.Expr
+        A sympy expression.
+
+    Returns
+    -------
+    str
+        The SHA-256 hash of the full representation (`srepr`) of the expression.
+
+    Examples
+    --------
+        >>> x = sympy.Symbol('x')
+        >>> fingerprint_of_expression(x + 1) == fingerprint_of_expression(1 + x)
+        True
+        >>> fingerprint_of_expression(x + 1) == fingerprint_of_expression(x + 2)
+        False
+    """
+    return hashlib.sha256(sympy.srepr(expression).encode()).hexdigest()
+
+
+def source_of_lambdified(name, args, expression):
+    """
+    Source code of a NumPy function computing a sympy expression.
+
+    Common subexpressions are eliminated first, which makes the code much shorter for expressions such as Hessians.
+
+    Parameters
+    ----------
+    name: str
+        The name of the generated function.
+    args: list of sympy.Symbol
+        The arguments of the generated function.
+    expression: sympy.Expr or sympy.Matrix
+        The expression.
+
+    Returns
+    -------
+    str
+        The source code of a function with one argument per symbol in `args`. It uses the module `numpy` under this
+        name.
+
+    Examples
+    --------
+        >>> x, y = sympy.symbols('x y')
+        >>> print(source_of_lambdified('f', [x, y], sympy.Matrix([[sympy.exp(x + y), 2 * sympy.exp(x + y)]])))
+        def f(x, y):
+            cse_0 = numpy.exp(x + y)
+            return numpy.array([[cse_0, 2*cse_0]])
+        <BLANKLINE>
+    """
+    printer = NumPyPrinter()
+    replacements, (reduced, ) = sympy.cse(expression, symbols=sympy.numbered_symbols("cse_"))
+    lines = [f"def {name}({', '.join(str(arg) for arg in args)}):"]
+    lines += [f"    {symbol} = {printer.doprint(value)}" for symbol, value in replacements]
+    lines.append(f"    return {printer.doprint(reduced)}")
+    return "\n".join(lines) + "\n"
+
+
+def lambdify_with_cache(name, args, expression_factory, key, fingerprint=None, cache_dir=None):
+    """
+    Convert a sympy expression into a NumPy function, with a persistent cache of the generated code.
+
+    The generated source code is saved in a JSON file of `cache_dir`, along with the key and the fingerprint. When the
+    function is needed again (e.g. in another process or a new session), the source code is read from the file, so
+    that the symbolic computations of the expression and the code generation are skipped entirely.
+
+    Parameters
+    ----------
+    name: str
+        The name of the function, e.g. "psi".
+    args: list of sympy.Symbol
+        The arguments of the function.
+    expression_factory: callable
+        A function with no argument that returns the sympy expression. It is called only if the code is not in cache.
+    key: str
+        A string identifying the expression, e.g. from the parameters of the model. It is used for the file name.
+    fingerprint: str
+        If specified, the cached code is used only if it was saved with the same fingerprint. Typically, this is the
+        fingerprint of an expression from which the expression of interest is derived, cf.
+        :func:`fingerprint_of_expression`.
+    cache_dir: str
+        The directory of the cache. If None, no cache is used.
+
+    Returns
+    -------
+    callable
+        The NumPy function.
+
+    Examples
+    --------
+        >>> import tempfile
+        >>> x = sympy.Symbol('x')
+        >>> def expression_factory():
+        ...     print('Symbolic computation...')
+        ...     return sympy.diff(x**3, x)
+        >>> with tempfile.TemporaryDirectory() as cache_dir:
+        ...     f = lambdify_with_cache('f', [x], expression_factory, key='cube', cache_dir=cache_dir)
+        ...     g = lambdify_with_cache('f', [x], expression_factory, key='cube', cache_dir=cache_dir)
+        Symbolic computation...
+        >>> f(2), g(np.array([1, 2]))
+        (12, array([ 3, 12]))
+    """
+    source = None
+    file_name = None
+    if cache_dir is not None:
+        file_name = os.path.join(cache_dir, f"{name}_{hashlib.sha256(key.encode()).hexdigest()[:32]}.json")
+        try:
+            with open(file_name) as f:
+                data = json.load(f)
+            if data['key'] == key and (fingerprint is None or data['fingerprint'] == fingerprint):
+                source = data['source']
+        except (FileNotFoundError, json.JSONDecodeError, KeyError):
+            pass
+    if source is None:
+        source = source_of_lambdified(name, args, expression_factory())
+        if file_name is not None:
+            os.makedirs(cache_dir, exist_ok=True)
+            with open(file_name, 'w') as f:
+                json.dump({'key': key, 'fingerprint': fingerprint, 'source': source}, f)
+    namespace = {'numpy': np}
+    exec(source, namespace)  # noqa: S102
+    return namespace[name]
@@ -0,0 +1,208 @@
+import numpy as np
+from scipy.special import logsumexp
+
+from actinvoting.util_gaussian import orthant_integral_of_gaussian
+
+
+def tilted_moments(log_coefficients, indicators, tau):
+    """
+    Moments of the higher-set indicator vector under the exponentially tilted distribution.
+
+    Let P be the characteristic polynomial, with coefficients p_S for each higher set S. The tilted distribution gives
+    to S the probability p_S e^(tau . 1_S) / P(e^tau). Its mean and covariance are the gradient and the Hessian of the
+    cumulant K(t) = log(P(e^t)) at tau.
+
+    Parameters
+    ----------
+    log_coefficients: ndarray
+        Logarithms of the coefficients of P, flattened, of shape (N, ) or (B, N) for a batch of B polynomials.
+    indicators: ndarray
+        Indicators of the higher sets, of shape (N, d).
+    tau: ndarray
+        The tilting parameter, of shape (d, ) or (B, d).
+
+    Returns
+    -------
+    tuple of ndarray
+        The cumulant K(tau) = log(P(e^tau)) of shape (B, ), the mean of shape (B, d) and the covariance of shape
+        (B, d, d). When the inputs are not batched, B = 1.
+
+    Examples
+    --------
+        >>> indicators = np.array([[0, 0], [0, 1], [1, 0], [1, 1]])
+        >>> log_coefficients = np.log([.25, .25, .25, .25])
+        >>> cumulant, mean, covariance = tilted_moments(log_coefficients, indicators, np.zeros(2))
+        >>> cumulant, mean, covariance
+        (array([0.]), array([[0.5, 0.5]]), array([[[0.25, 0.  ],
+                [0.  , 0.25]]]))
+    """
+    log_coefficients = np.atleast_2d(log_coefficients)
+    tau = np.atleast_2d(np.array(tau, dtype=float))
+    log_tilted = log_coefficients + tau @ indicators.T
+    cumulant = logsumexp(log_tilted, axis=1)
+    weights = np.exp(log_tilted - cumulant[:, np.newaxis])
+    mean = weights @ indicators
+    second_moment = np.einsum('bk,ki,kj->bij', weights, indicators, indicators)
+    covariance = second_moment - mean[:, :, np.newaxis] * mean[:, np.newaxis, :]
+    return cumulant, mean, covariance
+
+
+def solve_saddle_point(log_coefficients, indicators, beta, tol=1e-10, max_iterations=100):
+    """
+    Log saddle point, i.e. the maximizer of psi(t) = -K(t) + beta . t, computed by a damped Newton method.
+
+    The function -psi is convex, its gradient is the tilted mean minus beta, and its Hessian is the tilted covariance
+    (cf. :func:`tilted_moments`). The computation is vectorized over a batch of polynomials.
+
+    Parameters
+    ----------
+    log_coefficients: ndarray
+        Logarithms of the coefficients of P, flattened, of shape (N, ) or (B, N).
+    indicators: ndarray
+        Indicators of the higher sets, of shape (N, d).
+    beta: list of float
+        The vector beta, of size d, or of shape (B, d) to use a different vector for each polynomial.
+    tol: float
+        Tolerance on the gradient.
+    max_iterations: int
+        Maximal number of Newton iterations.
+
+    Returns
+    -------
+    ndarray
+        The log saddle point tau, of shape (B, d).
+
+    Examples
+    --------
+        >>> indicators = np.array([[0, 0], [0, 1], [1, 0], [1, 1]])
+        >>> log_coefficients = np.log([.4, .3, .2, .1])
+        >>> tau = solve_saddle_point(log_coefficients, indicators, beta=[.5, .5])
+        >>> _, mean, _ = tilted_moments(log_coefficients, indicators, tau)
+        >>> mean.round(8)
+        array([[0.5, 0.5]])
+    """
+    log_coefficients = np.atleast_2d(log_coefficients)
+    d = indicators.shape[1]
+    tau = np.zeros((log_coefficients.shape[0], d))
+    beta = np.broadcast_to(np.array(beta, dtype=float), tau.shape)
+
+    def minus_psi(t):
+        return logsumexp(log_coefficients + t @ indicators.T, axis=1) - np.sum(t * beta, axis=1)
+
+    for _ in range(max_iterations):
+        cumulant, mean, covariance = tilted_moments(log_coefficients, indicators, tau)
+        gradient = mean - beta
+        if np.all(np.abs(gradient) < tol):
+            break
+        step = -np.linalg.solve(covariance + 1e-14 * np.eye(d), gradient[:, :, np.newaxis])[:, :, 0]
+        # Backtracking line search (Armijo rule), row by row.
+        value = cumulant - np.sum(tau * beta, axis=1)
+        slope = np.sum(gradient * step, axis=1)
+        step_size = np.ones(len(tau))
+        for _ in range(60):
+            candidate = tau + step_size[:, np.newaxis] * step
+            rejected = minus_psi(candidate) > value + 1e-4 * step_size * slope
+            if not np.any(rejected):
+                break
+            step_size[rejected] /= 2
+        tau = tau + step_size[:, np.newaxis] * step
+    return tau
+
+
+def log_equivalent_constants(tau, hessian):
+    """
+    The parts of the logarithm of the theoretical equivalent that do not depend on n, from numerical values.
+
+    Parameters
+    ----------
+    tau: ndarray
+        The log saddle point, of size d = m-1.
+    hessian: ndarray
+        The Hessian of the cumulant at tau, of size d * d.
+
+    Returns
+    -------
+    tuple
+        A boolean mask of the subcritical adversaries, and the constant term, such that the logarithm of the
+        equivalent is n log(P(zeta)) - sum_{j subcritical} (ceil(beta_j n) - 1) tau_j - (number of subcritical) *
+        log(n) / 2 + constant.
+
+    Raises
+    ------
+    NotImplementedError
+        If some adversary is supercritical.
+
+    Examples
+    --------
+        >>> subcritical, constant = log_equivalent_constants(np.zeros(2), np.array([[.25, 0], [0, .25]]))
+        >>> subcritical
+        array([False, False])
+        >>> print(f'{np.exp(constant):.6f}')
+        0.250000
+    """
+    tau = np.array(tau, dtype=float)
+    critical = np.isclose(tau, 0)
+    subcritical = (tau < 0) & ~critical
+    if not np.all(critical | subcritical):
+        raise NotImplementedError("Supercritical cases are not implemented yet.")
+    log_integral = 0.
+    if np.any(critical):
+        matrix_m = np.linalg.inv(hessian)[critical, :][:, critical]
+        log_integral = np.log(orthant_integral_of_gaussian(matrix_m, seed=0)[0])
+    constant = (
+        log_integral - np.sum(np.log(-np.expm1(tau[subcritical])))
+        - (len(tau) * np.log(2 * np.pi) + np.linalg.slogdet(hessian)[1]) / 2
+    )
+    return subcritical, float(constant)
+
+
+def log_chernoff_bounds(log_coefficients, indicators, tau, ns, max_counts):
+    """
+    The logarithms of the Chernoff upper bounds of the probability that c is an alpha-winner.
+
+    Let S_j be the number of voters preferring adversary j to c. For any t <= 0 (coordinate-wise), on the event that
+    S_j <= K_j for all j, we have exp(sum_j t_j (S_j - K_j)) >= 1. Taking the expectation, the probability of the
+    event is at most P(exp(t))^n exp(-sum_j t_j K_j). The bound is the sharpest when t is the log saddle point; for a
+    supercritical adversary (tau_j > 0), we use t_j = 0 instead. Unlike the theoretical equivalent, the bound holds
+    for any n.
+
+    Parameters
+    ----------
+    log_coefficients: ndarray
+        The logarithms of the coefficients of the characteristic polynomial (-inf for null coefficients), flattened,
+        in the order of `indicators`.
+    indicators: ndarray
+        The indicators of the higher sets, of shape (2^d, d).
+    tau: ndarray
+        The log saddle point, of size d.
+    ns: list of int
+        The numbers of voters.
+    max_counts: ndarray
+        Array of shape (len(ns), d). Element (i, j) is the maximal number of voters preferring j to c with ns[i]
+        voters, i.e. ceil(beta_j ns[i]) - 1.
+
+    Returns
+    -------
+    ndarray
+        The natural logarithms of the upper bounds, for each value in `ns`. They are at most 0, and they are -inf when
+        the event is impossible.
+
+    Examples
+    --------
+        >>> log_coefficients = np.log(np.full(4, .25))  # Two independent fair duels.
+        >>> indicators = np.array([[0, 0], [0, 1], [1, 0], [1, 1]])
+        >>> bounds = np.exp(log_chernoff_bounds(log_coefficients, indicators, np.zeros(2), [10], [[4, 4]]))
+        >>> print(f'{bounds[0]:.6f}')
+        1.000000
+        >>> tau = np.log([.25, .25])  # The saddle point for beta = [1/5, 1/5].
+        >>> bounds = np.exp(log_chernoff_bounds(log_coefficients, indicators, tau, [10, 0], [[2, 2], [-1, -1]]))
+        >>> [f'{bound:.6f}' for bound in bounds]  # The exact value for n=10 is (56 / 1024)^2 = 0.002991.
+        ['0.021176', '0.000000']
+    """
+    tau = np.minimum(np.array(tau, dtype=float), 0.)
+    ns = np.array(ns, dtype=float).ravel()
+    max_counts = np.array(max_counts, dtype=float).reshape(len(ns), len(tau))
+    log_p_of_zeta = logsumexp(log_coefficients + indicators @ tau)
+    result = np.minimum(ns * log_p_of_zeta - max_counts @ tau, 0.)
+    result[np.any(max_counts < 0, axis=1)] = -np.inf
+    return result
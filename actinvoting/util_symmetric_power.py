@@ -0,0 +1,131 @@
+from itertools import combinations_with_replacement
+from math import factorial
+
+import numpy as np
+
+
+def symmetric_truncated_power_sum(coefficients, groups, n, max_counts):
+    """
+    Sum of the truncated coefficients of the power of a multilinear polynomial that is symmetric in groups of variables.
+
+    Let P be a multilinear polynomial with nonnegative coefficients, which is invariant under the permutations of the
+    variables within each group. We compute the sum of the coefficients of P^n whose exponents are at most
+    `max_counts`, as :func:`truncated_power` would do, but P^n is also symmetric, so we only keep in memory the
+    coefficients whose exponents are sorted within each group. In a group of size s where the exponents are at most
+    K, there are binomial(K + s, s) sorted vectors of exponents instead of (K + 1)^s, which saves a factor of about
+    s!.
+
+    Parameters
+    ----------
+    coefficients: ndarray
+        Coefficients of the multilinear polynomial P, of shape (2, ..., 2) (d times).
+    groups: list of list of int
+        A partition of the variables (0 to d-1) into groups, such that P is symmetric within each group.
+    n: int
+        The exponent.
+    max_counts: list of int
+        For each variable, the maximal exponent to keep. It must be the same for all the variables of a group.
+
+    Returns
+    -------
+    float
+        The sum of the coefficients of P^n whose exponents are at most `max_counts`. If some threshold is negative,
+        the sum is 0.
+
+    Examples
+    --------
+        >>> coefficients = np.array([[.25, .25], [.25, .25]])  # (1 + x)(1 + y) / 4
+        >>> float(symmetric_truncated_power_sum(coefficients, groups=[[0, 1]], n=2, max_counts=[1, 1]))
+        0.5625
+    """
+    max_counts = np.array(max_counts, dtype=int)
+    if np.any(max_counts < 0):
+        return 0.
+    for group in groups:
+        if np.any(max_counts[group] != max_counts[group[0]]):
+            raise ValueError("The thresholds must be equal within each group.")
+    # For each group: the sorted vectors of exponents, sorted by rank, and the rank of each one after removing each
+    # sub-mask (-1 if an exponent becomes negative).
+    sorted_exponents = []
+    pulls = []
+    for group in groups:
+        s = len(group)
+        cap = min(int(max_counts[group[0]]), n)
+        binomials = _binomial_table(cap + s, s)
+        exponents = np.array(list(combinations_with_replacement(range(cap + 1), s)), dtype=np.int64).reshape(-1, s)
+        exponents = exponents[np.argsort(_multiset_ranks(exponents, binomials))]
+        sorted_exponents.append(exponents)
+        pull = np.empty((2 ** s, len(exponents)), dtype=np.int64)
+        for sub_mask_index, sub_mask in enumerate(np.ndindex((2, ) * s)):
+            shifted = np.sort(exponents - np.array(sub_mask, dtype=np.int64), axis=1)
+            valid = np.all(shifted >= 0, axis=1)
+            pull[sub_mask_index] = np.where(valid, _multiset_ranks(np.maximum(shifted, 0), binomials), -1)
+        pulls.append(pull)
+    sizes = [len(exponents) for exponents in sorted_exponents]
+    strides = [int(np.prod(sizes[g + 1:], dtype=np.int64)) for g in range(len(groups))]
+    n_states = int(np.prod(sizes, dtype=np.int64))
+    # Rank of each state in each group.
+    state_ranks = [(np.arange(n_states) // stride) % size for stride, size in zip(strides, sizes)]
+    # For each mask of positive coefficient, the index of the predecessor of each state (n_states if invalid).
+    transitions = []
+    for mask, coefficient in np.ndenumerate(coefficients):
+        if coefficient == 0:
+            continue
+        predecessor = np.zeros(n_states, dtype=np.int64)
+        valid = np.ones(n_states, dtype=bool)
+        for group, pull, state_rank, stride in zip(groups, pulls, state_ranks, strides):
+            sub_mask_index = int(''.join(str(mask[j]) for j in group), 2)
+            rank = pull[sub_mask_index][state_rank]
+            valid &= rank >= 0
+            predecessor += rank * stride
+        transitions.append((coefficient, np.where(valid, predecessor, n_states)))
+    table = np.zeros(n_states + 1)
+    table[0] = 1.
+    for _ in range(n):
+        new_table = np.zeros(n_states + 1)
+        for coefficient, predecessor in transitions:
+            new_table[:n_states] += coefficient * table[predecessor]
+        table = new_table
+    # Each sorted vector stands for all its distinct permutations.
+    multiplicities = np.ones(n_states)
+    for exponents, state_rank in zip(sorted_exponents, state_ranks):
+        multiplicities *= _numbers_of_permutations(exponents)[state_rank]
+    return float(table[:n_states] @ multiplicities)
+
+
+def _binomial_table(n_max, k_max):
+    """
+    Table of the binomial coefficients binomial(v, i), for 0 <= v <= n_max and 0 <= i <= k_max, as integers.
+    """
+    table = np.zeros((n_max + 1, k_max + 1), dtype=np.int64)
+    table[:, 0] = 1
+    for v in range(1, n_max + 1):
+        table[v, 1:] = table[v - 1, 1:] + table[v - 1, :-1]
+    return table
+
+
+def _multiset_ranks(exponents, binomials):
+    """
+    Ranks of sorted vectors of exponents in the combinatorial number system.
+
+    The sorted vector a_1 <= ... <= a_s is mapped to the combination a_1 < a_2 + 1 < ... < a_s + s - 1, whose rank is
+    the sum of binomial(a_i + i - 1, i). This is a bijection onto 0, ..., binomial(K + s, s) - 1.
+    """
+    s = exponents.shape[1]
+    shifted = exponents + np.arange(s)
+    return sum(binomials[shifted[:, i], i + 1] for i in range(s))
+
+
+def _numbers_of_permutations(exponents):
+    """
+    For each sorted vector of exponents, the number of its distinct permutations.
+    """
+    s = exponents.shape[1]
+    result = np.full(len(exponents), float(factorial(s)))
+    run_lengths = np.ones(len(exponents))
+    for i in range(1, s):
+        same = exponents[:, i] == exponents[:, i - 1]
+        run_lengths = np.where(same, run_lengths + 1, 1)
+        # Dividing by the current run length at each step divides by the factorial of each run length.
+        result /= np.where(same, run_lengths, 1)
+    return result
@@ -0,0 +1,310 @@
+import os
+import tempfile
+
+import numpy as np
+from joblib import Parallel, delayed, effective_n_jobs
+from scipy.special import logsumexp
+
+
+def multiply_truncated(table, coefficients, shape=None):
+    """
+    Multiply a polynomial by a multilinear polynomial, discarding the exponents that exceed a given shape.
+
+    Parameters
+    ----------
+    table: ndarray
+        Coefficients of the first polynomial, of dimension d. Coefficient `table[k_1, ..., k_d]` corresponds to the
+        monomial x_1^k_1 ... x_d^k_d.
+    coefficients: ndarray
+        Coefficients of the multilinear polynomial, of shape (2, ..., 2) (d times).
+    shape: tuple of int
+        Shape of the result. Monomials whose exponents do not fit into this shape are discarded. Default: the shape
+        of `table`.
+
+    Returns
+    -------
+    ndarray
+        Coefficients of the product, truncated to the given shape.
+
+    Examples
+    --------
+        >>> table = np.array([1., 2., 3.])  # 1 + 2 x + 3 x^2
+        >>> coefficients = np.array([1., 1.])  # 1 + x
+        >>> multiply_truncated(table, coefficients)
+        array([1., 3., 5.])
+        >>> multiply_truncated(table, coefficients, shape=(4, ))
+        array([1., 3., 5., 3.])
+    """
+    if shape is None:
+        shape = table.shape
+    result = np.zeros(shape, dtype=table.dtype)
+    for mask in np.ndindex(coefficients.shape):
+        coefficient = coefficients[mask]
+        if coefficient == 0:
+            continue
+        lengths = [min(length_table, length_result - bit)
+                   for length_table, length_result, bit in zip(table.shape, shape, mask)]
+        source = tuple(slice(0, length) for length in lengths)
+        destination = tuple(slice(bit, bit + length) for bit, length in zip(mask, lengths))
+        result[destination] += coefficient * table[source]
+    return result
+
+
+def log_multiply_truncated(log_table, log_coefficients, shape=None):
+    """
+    Same as :func:`multiply_truncated`, but all the coefficients are given and returned as logarithms.
+
+    The product is computed with log-sum-exp convolutions, so that coefficients below the smallest positive float can
+    be handled. Null coefficients are represented by -inf.
+
+    Parameters
+    ----------
+    log_table: ndarray
+        Logarithms of the coefficients of the first polynomial, of dimension d.
+    log_coefficients: ndarray
+        Logarithms of the coefficients of the multilinear polynomial, of shape (2, ..., 2) (d times).
+    shape: tuple of int
+        Shape of the result. Default: the shape of `log_table`.
+
+    Returns
+    -------
+    ndarray
+        Logarithms of the coefficients of the product, truncated to the given shape.
+
+    Examples
+    --------
+        >>> log_table = np.log([1., 2., 3.])  # 1 + 2 x + 3 x^2
+        >>> log_coefficients = np.log([1e-300, 1e-300])  # 1e-300 (1 + x)
+        >>> np.exp(log_multiply_truncated(log_table, log_coefficients) + 300 * np.log(10)).round(6)
+        array([1., 3., 5.])
+    """
+    if shape is None:
+        shape = log_table.shape
+    result = np.full(shape, -np.inf)
+    for mask in np.ndindex(log_coefficients.shape):
+        log_coefficient = log_coefficients[mask]
+        if log_coefficient == -np.inf:
+            continue
+        lengths = [min(length_table, length_result - bit)
+                   for length_table, length_result, bit in zip(log_table.shape, shape, mask)]
+        source = tuple(slice(0, length) for length in lengths)
+        destination = tuple(slice(bit, bit + length) for bit, length in zip(mask, lengths))
+        result[destination] = np.logaddexp(result[destination], log_coefficient + log_table[source])
+    return result
+
+
+def truncated_power(coefficients, n, max_counts):
+    """
+    Power of a multilinear polynomial, discarding the monomials whose exponents exceed some thresholds.
+
+    Since all coefficients are nonnegative and exponents never decrease during the multiplications, a monomial whose
+    exponents exceed the thresholds can be discarded as soon as it appears. Hence the cost is bounded by
+    n * 2^d * prod(max_counts + 1).
+
+    Parameters
+    ----------
+    coefficients: ndarray
+        Coefficients of the multilinear polynomial P, of shape (2, ..., 2) (d times).
+    n: int
+        The exponent.
+    max_counts: list of int
+        For each variable, the maximal exponent to keep. They must be nonnegative.
+
+    Returns
+    -------
+    ndarray
+        Coefficients of P^n, restricted to the monomials whose exponents are at most `max_counts`.
+
+    Examples
+    --------
+        >>> coefficients = np.array([[.25, .25], [.25, .25]])  # (1 + x)(1 + y) / 4
+        >>> truncated_power(coefficients, n=2, max_counts=[1, 2]) * 16
+        array([[1., 2., 1.],
+               [2., 4., 2.]])
+    """
+    max_counts = np.array(max_counts, dtype=int)
+    table = np.ones((1, ) * len(max_counts), dtype=float)
+    for i in range(n):
+        # After i + 1 multiplications, the exponents are at most i + 1.
+        shape = tuple(np.minimum(i + 1, max_counts) + 1)
+        table = multiply_truncated(table, coefficients, shape)
+    return table
+
+
+def truncated_power_sums(coefficients, ns, max_counts):
+    """
+    Sums of the truncated coefficients of the powers of a multilinear polynomial, for several exponents in one pass.
+
+    The exponent is increased one by one, up to max(ns), while keeping the truncated coefficients of P^n in memory.
+    At each requested exponent, we read off the sum of the coefficients that are within the corresponding thresholds.
+    Hence the cost is about the same as :func:`truncated_power` for the largest exponent.
+
+    Parameters
+    ----------
+    coefficients: ndarray
+        Coefficients of the multilinear polynomial P, of shape (2, ..., 2) (d times).
+    ns: list of int
+        The exponents.
+    max_counts: ndarray
+        Array of shape (len(ns), d). For each exponent and each variable, the maximal exponent to keep.
+
+    Returns
+    -------
+    ndarray
+        For each exponent n in `ns`, the sum of the coefficients of P^n whose exponents are at most the corresponding
+        `max_counts`. If some threshold is negative, the sum is 0.
+
+    Examples
+    --------
+        >>> coefficients = np.array([[.25, .25], [.25, .25]])  # (1 + x)(1 + y) / 4
+        >>> truncated_power_sums(coefficients, ns=[2, 1], max_counts=[[0, 1], [0, 0]])
+        array([0.1875, 0.25  ])
+    """
+    return _truncated_power_reductions(coefficients, ns, max_counts, multiply_truncated, 1., 0., np.sum)
+
+
+def truncated_power_log_sums(log_coefficients, ns, max_counts):
+    """
+    Same as :func:`truncated_power_sums`, but in log-space.
+
+    Parameters
+    ----------
+    log_coefficients: ndarray
+        Logarithms of the coefficients of the multilinear polynomial P, of shape (2, ..., 2) (d times).
+    ns: list of int
+        The exponents.
+    max_counts: ndarray
+        Array of shape (len(ns), d). For each exponent and each variable, the maximal exponent to keep.
+
+    Returns
+    -------
+    ndarray
+        For each exponent n in `ns`, the logarithm of the sum of the coefficients of P^n whose exponents are at most
+        the corresponding `max_counts`. If some threshold is negative, the result is -inf.
+
+    Examples
+    --------
+        >>> log_coefficients = np.log([[.25, .25], [.25, .25]])  # (1 + x)(1 + y) / 4
+        >>> np.exp(truncated_power_log_sums(log_coefficients, ns=[2, 1], max_counts=[[0, 1], [0, 0]]))
+        array([0.1875, 0.25  ])
+        >>> truncated_power_log_sums(log_coefficients, ns=[1000], max_counts=[[0, 0]])  # log(1 / 4^1000)
+        array([-1386.29436112])
+    """
+    return _truncated_power_reductions(
+        log_coefficients, ns, max_counts, log_multiply_truncated, 0., -np.inf, logsumexp)
+
+
+def _truncated_power_reductions(coefficients, ns, max_counts, multiply, one, zero, reduce):
+    """
+    Auxiliary function for :func:`truncated_power_sums` and :func:`truncated_power_log_sums`.
+
+    Parameters
+    ----------
+    coefficients: ndarray
+        Coefficients of the multilinear polynomial P (possibly as logarithms).
+    ns: list of int
+        The exponents.
+    max_counts: ndarray
+        Array of shape (len(ns), d). For each exponent and each variable, the maximal exponent to keep.
+    multiply: callable
+        The truncated multiplication, e.g. :func:`multiply_truncated`.
+    one: float
+        The representation of 1 (e.g. 0. in log-space).
+    zero: float
+        The representation of 0 (e.g. -inf in log-space).
+    reduce: callable
+        The function used to sum the coefficients (e.g. `logsumexp` in log-space).
+
+    Returns
+    -------
+    ndarray
+        For each exponent, the reduced sum of the coefficients of P^n that are within the thresholds.
+    """
+    max_counts = np.array(max_counts, dtype=int).reshape(len(ns), coefficients.ndim)
+    sums = np.full(len(ns), zero)
+    if len(ns) == 0:
+        return sums
+    max_counts_overall = np.maximum(max_counts.max(axis=0), 0)
+    d_n_indices = {}
+    for index, n in enumerate(ns):
+        d_n_indices.setdefault(n, []).append(index)
+    table = np.full((1, ) * coefficients.ndim, one)
+    for i in range(max(ns) + 1):
+        if i > 0:
+            shape = tuple(np.minimum(i, max_counts_overall) + 1)
+            table = multiply(table, coefficients, shape)
+        for index in d_n_indices.get(i, []):
+            if np.all(max_counts[index] >= 0):
+                sums[index] = reduce(table[tuple(slice(0, k + 1) for k in max_counts[index])])
+    return sums
+
+
+def truncated_power_sum_sharded(coefficients, n, max_counts, n_jobs=-1, n_shards=None, temp_folder=None):
+    """
+    Sum of the truncated coefficients of the power of a multilinear polynomial, computed by several processes.
+
+    This computes the same as `truncated_power(coefficients, n, max_counts).sum()`, with the same floating-point
+    operations in the same order, hence the result is identical. The table of truncated coefficients is stored in
+    memory-mapped files and split into slabs along the first axis. At each multiplication by P, each worker reads its
+    slab of the current table, plus one row before it (since the exponent of the first variable increases by at most
+    1), and writes its slab of the next table. Hence the memory used by each worker is bounded by the size of a slab.
+
+    Parameters
+    ----------
+    coefficients: ndarray
+        Coefficients of the multilinear polynomial P, of shape (2, ..., 2) (d times).
+    n: int
+        The exponent.
+    max_counts: list of int
+        For each variable, the maximal exponent to keep. If some threshold is negative, the sum is 0.
+    n_jobs: int
+        The number of parallel jobs (as in joblib).
+    n_shards: int
+        The number of slabs. Default: the number of jobs. Using more slabs reduces the memory per worker.
+    temp_folder: str
+        The folder where the memory-mapped tables are stored (in a temporary subfolder). Default: the default
+        temporary folder of the system.
+
+    Returns
+    -------
+    float
+        The sum of the coefficients of P^n whose exponents are at most `max_counts`.
+
+    Examples
+    --------
+        >>> coefficients = np.array([[.25, .25], [.25, .25]])  # (1 + x)(1 + y) / 4
+        >>> truncated_power_sum_sharded(coefficients, n=2, max_counts=[0, 1], n_jobs=1, n_shards=2)
+        0.1875
+    """
+    max_counts = np.minimum(np.array(max_counts, dtype=int), n)
+    if np.any(max_counts < 0):
+        return 0.
+    shape = tuple(int(k) + 1 for k in max_counts)
+    if n_shards is None:
+        n_shards = effective_n_jobs(n_jobs)
+    bounds = [(int(rows[0]), int(rows[-1]) + 1) for rows in np.array_split(np.arange(shape[0]), n_shards) if len(rows)]
+    with tempfile.TemporaryDirectory(dir=temp_folder) as folder:
+        file_names = [os.path.join(folder, 'table_0.npy'), os.path.join(folder, 'table_1.npy')]
+        table = np.lib.format.open_memmap(file_names[0], mode='w+', dtype=float, shape=shape)
+        table[(0, ) * len(shape)] = 1.
+        table.flush()
+        np.lib.format.open_memmap(file_names[1], mode='w+', dtype=float, shape=shape).flush()
+        del table
+        with Parallel(n_jobs=n_jobs) as parallel:
+            for i in range(n):
+                current, following = file_names[i % 2], file_names[(i + 1) % 2]
+                parallel(delayed(_multiply_slab)(current, following, coefficients, start, stop)
+                         for start, stop in bounds)
+        return float(np.load(file_names[n % 2], mmap_mode='r').sum())
+
+
+def _multiply_slab(current, following, coefficients, start, stop):
+    """
+    Auxiliary function for :func:`truncated_power_sum_sharded`: compute rows `start` to `stop` of the next table.
+    """
+    table = np.load(current, mmap_mode='r')
+    low = max(start - 1, 0)
+    slab = np.array(table[low:stop])
+    result = np.load(following, mmap_mode='r+')
+    result[start:stop] = multiply_truncated(slab, coefficients)[start - low:]
+    result.flush()
@@ -2,11 +2,24 @@ from math import prod
 
 import numpy as np
 import sympy
-from more_itertools import powerset
-from scipy.integrate import nquad
+from joblib import Parallel, delayed, effective_n_jobs
+from more_itertools import distribute, powerset
 from scipy.optimize import minimize
+from scipy.special import logsumexp
+from sympy.polys.domains import QQ
+from sympy.polys.rings import ring
 
+from actinvoting.duel_count_distribution import DuelCountDistribution
+from actinvoting.numeric_snapshot import NumericSnapshot
+from actinvoting.util import max_counts_of_thresholds
 from actinvoting.util_cache import cached_property
+from actinvoting.util_fft_power import fft_power_log_sum
+from actinvoting.util_gaussian import orthant_integral_of_gaussian
+from actinvoting.util_lambdify_cache import fingerprint_of_expression, lambdify_with_cache
+from actinvoting.util_saddle_point import log_chernoff_bounds
+from actinvoting.util_symmetric_power import symmetric_truncated_power_sum
+from actinvoting.util_truncated_power import truncated_power, truncated_power_log_sums, truncated_power_sum_sharded, \
+    truncated_power_sums
 
 
 class WorkSession:
@@ -29,10 +42,17 @@ class WorkSession:
         The log saddle point. If not specified, it is computed by maximizing the psi function. The advantage of
         specifying it is that it can be used for formal computations (whereas when it is computed by the work session
         itself, this is done by numerical optimization).
+    cache_dir : str, optional
+        If specified, the NumPy code generated from the symbolic expressions (psi and the Hessian of the cumulant) is
+        saved in this directory, keyed by the culture, `c` and `alpha`. Other sessions and worker processes with the
+        same parameters then load it and skip the symbolic differentiation and the code generation.
+    n_jobs : int, optional
+        The number of parallel jobs used to compute the coefficients of the characteristic polynomial. If n_jobs=1
+        (default), the computation is done in a single process.
     """
 
 
-    def __init__(self, culture, c, alpha=None, tau=None):
+    def __init__(self, culture, c, alpha=None, tau=None, cache_dir=None, n_jobs=1):
         if alpha is None:
             alpha = [sympy.Rational(1, 2)] * culture.m
         self.culture = culture
@@ -46,6 +66,121 @@ class WorkSession:
         self.x = sympy.symarray("x", self.m)
         self.t = sympy.symarray("t", self.m)
         self._tau = tau
+        self.cache_dir = cache_dir
+        self.n_jobs = n_jobs
+
+    @cached_property
+    def characteristic_coefficients(self):
+        """
+        The coefficients of the characteristic polynomial P, as a tensor.
+
+        Returns
+        -------
+        ndarray
+            Array of shape (2, ..., 2) (m-1 times). The coefficient of index (b_1, ..., b_{m-1}) is the probability
+            that the adversaries higher than `c` are exactly those for which b_j = 1, where the adversaries are taken
+            in increasing order.
+
+            The coefficient only depends on the number of adversaries of each exchangeable group (cf.
+            :meth:`Culture.exchangeable_adversaries`) in the higher set, so it is computed once per such type.
+
+            If `n_jobs` > 1, the higher sets are distributed among the workers (in a round-robin way, since the cost
+            of a coefficient depends on the size of the higher set), then the partial tables are merged. Each
+            coefficient is computed exactly as in the serial case, so the result is identical.
+        """
+        adversaries_sorted = sorted(self.adversaries)
+        groups = self.culture.exchangeable_adversaries(self.c)
+
+        def type_of_higher_set(higher):
+            return tuple(len(group & set(higher)) for group in groups)
+        d_type_representative = {}
+        for higher in powerset(adversaries_sorted):
+            d_type_representative.setdefault(type_of_higher_set(higher), higher)
+        subsets = list(d_type_representative.values())
+        if self.n_jobs == 1:
+            partial_tables = [_probas_high_low(self.culture, self.c, adversaries_sorted, subsets)]
+        else:
+            partial_tables = Parallel(n_jobs=self.n_jobs)(
+                delayed(_probas_high_low)(self.culture, self.c, adversaries_sorted, list(shard))
+                for shard in distribute(4 * effective_n_jobs(self.n_jobs), subsets)
+            )
+        d_type_coefficient = {}
+        for partial_table in partial_tables:
+            for mask, coefficient in partial_table:
+                higher = [d for d, bit in zip(adversaries_sorted, mask) if bit]
+                d_type_coefficient[type_of_higher_set(higher)] = coefficient
+        coefficients = np.zeros((2, ) * (self.m - 1), dtype=object)
+        for higher in powerset(adversaries_sorted):
+            mask = tuple(int(d in higher) for d in adversaries_sorted)
+            coefficients[mask] = d_type_coefficient[type_of_higher_set(higher)]
+        return coefficients
+
+    @cached_property
+    def exchangeable_groups(self):
+        """
+        Groups of adversaries that play symmetric roles, both in the culture and in the thresholds.
+
+        Returns
+        -------
+        list of list of int
+            A partition of the indices of the adversaries (0 to m-2, i.e. the adversaries in increasing order). Two
+            adversaries are in the same group if they are exchangeable in the culture (cf.
+            :meth:`Culture.exchangeable_adversaries`) and have the same threshold beta.
+        """
+        adversaries_sorted = sorted(self.adversaries)
+        groups = []
+        for group in self.culture.exchangeable_adversaries(self.c):
+            d_beta_indices = {}
+            for i, d in enumerate(adversaries_sorted):
+                if d in group:
+                    d_beta_indices.setdefault(self.beta[d], []).append(i)
+            groups.extend(d_beta_indices.values())
+        return groups
+
+    @cached_property
+    def characteristic_coefficients_as_floats(self):
+        """
+        The coefficients of the characteristic polynomial P, as a tensor of floats.
+
+        Returns
+        -------
+        ndarray
+            Same as `characteristic_coefficients`, but converted to floats.
+        """
+        return np.array(self.characteristic_coefficients, dtype=float)
+
+    @cached_property
+    def characteristic_coefficients_as_logs(self):
+        """
+        The logarithms of the coefficients of the characteristic polynomial P.
+
+        Returns
+        -------
+        ndarray
+            Same as `characteristic_coefficients`, but each coefficient is replaced by its logarithm, as a float (-inf
+            for null coefficients). When the coefficients are symbolic, the logarithm is computed before conversion
+            to float, so that tiny coefficients do not underflow.
+        """
+        def log_as_float(coefficient):
+            if coefficient == 0:
+                return -np.inf
+            if isinstance(coefficient, sympy.Basic):
+                return float(sympy.log(coefficient))
+            return float(np.log(float(coefficient)))
+        return np.vectorize(log_as_float, otypes=[float])(self.characteristic_coefficients)
+
+    @cached_property
+    def higher_set_indicators(self):
+        """
+        The indicators of the possible higher sets, in the same order as the flattened `characteristic_coefficients`.
+
+        Returns
+        -------
+        ndarray
+            Array of shape (2^(m-1), m-1). Row i is the index of the i-th coefficient in `characteristic_coefficients`,
+            i.e., the indicator vector of the adversaries that are higher than `c` (in increasing order).
+        """
+        return np.array(list(np.ndindex((2, ) * (self.m - 1))), dtype=int).reshape(-1, self.m - 1)
 
     @cached_property
     def characteristic_polynomial(self):
@@ -57,10 +192,10 @@ class WorkSession:
         sympy.Expr
             The characteristic polynomial.
         """
+        adversaries_sorted = sorted(self.adversaries)
         return sympy.Add(*[
-            self.culture.proba_high_low(self.c, set(higher), self.adversaries - set(higher))
-            * sympy.Mul(*[self.x[d] for d in higher])
-            for higher in powerset(self.adversaries)
+            coefficient * sympy.Mul(*[self.x[d] for d, bit in zip(adversaries_sorted, mask) if bit])
+            for mask, coefficient in np.ndenumerate(self.characteristic_coefficients)
         ])
 
     @cached_property
@@ -101,7 +236,7 @@ class WorkSession:
         """
         if self._tau is not None:
             return self._tau
-        psi_lambdified = sympy.lambdify([*self.t[:self.c], *self.t[self.c + 1:]], self.psi, "numpy")
+        psi_lambdified = self._lambdify("psi", lambda: self.psi)
 
         def minus_psi_vector_input(v):
             return -psi_lambdified(*v)
@@ -166,6 +301,54 @@ class WorkSession:
             self.cumulant, [*self.t[:self.c], *self.t[self.c + 1:]]
         ).subs({self.t[j]: self.tau[j] for j in range(self.m)})
 
+    @cached_property
+    def hessian_of_k_at_tau_as_floats(self):
+        """
+        The Hessian of the cumulant at the log saddle point, computed numerically.
+
+        The symbolic Hessian of the cumulant is converted into NumPy code, which is cached on disk if `cache_dir` is
+        specified, then evaluated at tau.
+
+        Returns
+        -------
+        ndarray
+            The Hessian of the cumulant at the log saddle point, of size (m-1) * (m-1).
+        """
+        hessian_lambdified = self._lambdify(
+            "hessian_of_k", lambda: sympy.hessian(self.cumulant, [*self.t[:self.c], *self.t[self.c + 1:]]))
+        tau_short = [float(self.tau[j]) for j in sorted(self.adversaries)]
+        return np.array(hessian_lambdified(*tau_short), dtype=float).reshape(self.m - 1, self.m - 1)
+
+    def _lambdify(self, name, expression_factory, args=None):
+        """
+        Convert an expression depending on the short vector t (without t[c]) into a NumPy function.
+
+        Parameters
+        ----------
+        name: str
+            The name of the function.
+        expression_factory: callable
+            A function with no argument that returns the sympy expression.
+        args: list of sympy.Symbol, optional
+            The arguments of the function. Default: the short vector t.
+
+        Returns
+        -------
+        callable
+            The NumPy function. If `cache_dir` is specified, the generated code is cached on disk, keyed by the culture,
+            `c` and `alpha`, and checked against the fingerprint of the characteristic polynomial.
+        """
+        key = f"{self.culture!r}_c={self.c}_alpha={[str(alpha_d) for alpha_d in self.alpha]}"
+        fingerprint = None
+        if self.cache_dir is not None:
+            fingerprint = fingerprint_of_expression(self.characteristic_polynomial)
+        if args is None:
+            args = [*self.t[:self.c], *self.t[self.c + 1:]]
+        return lambdify_with_cache(
+            name=name, args=args, expression_factory=expression_factory,
+            key=key, fingerprint=fingerprint, cache_dir=self.cache_dir
+        )
+
     @cached_property
     def hessian_of_k_at_tau_computed_from_h_p_zeta(self):
         """
@@ -275,14 +458,22 @@ class WorkSession:
         np.ndarray
             The matrix M.
         """
-        critical = list(self.critical_candidates)
-        return self.inverse_of_hessian_of_k_at_tau[critical, :][:, critical]
+        # The Hessian is indexed by the adversaries only, so we convert candidates into indices of size m-1.
+        critical = [j - (j > self.c) for j in sorted(self.critical_candidates)]
+        return np.linalg.inv(self.hessian_of_k_at_tau_as_floats)[critical, :][:, critical]
 
     @cached_property
     def integral_of_gaussian_m_with_error(self):
         """
         The integral appearing in the theoretical equivalent, along the margin of error in the numerical integration.
 
+        The integral of exp(-u^T M u / 2) over the positive orthant is equal to (2 pi)^(k/2) / sqrt(det(M)) times the
+        probability that a centered Gaussian vector of covariance M^(-1) lies in the positive orthant, where k is the
+        number of critical candidates. The latter is computed by :func:`orthant_probability`: with closed forms in
+        dimension up to 3, and with Genz's quasi-Monte Carlo algorithm otherwise (cf.
+        :func:`orthant_integral_of_gaussian`). The quasi-Monte Carlo points are scrambled with a fixed seed, so that
+        the result does not change from one session to another.
+
         Returns
         -------
         tuple of float
@@ -290,10 +481,7 @@ class WorkSession:
         """
         if self.n_critical_candidates == 0:
             return 1, 0
-        m = np.array(self.matrix_m, dtype=float)
-        def f(*u):
-            return np.exp(- np.array(u) @ m @ np.array(u) / 2)
-        return nquad(f, [[0, np.inf]] * self.n_critical_candidates)
+        return orthant_integral_of_gaussian(self.matrix_m, seed=0)
 
     @cached_property
     def integral_of_gaussian_m(self):
@@ -340,25 +528,579 @@ class WorkSession:
         )
         return numerator / denominator
 
-    def exact_probability(self, n):
+    def log_equivalent_many(self, ns):
+        """
+        The logarithm of the equivalent of the probability that c is an alpha-winner, for an array of values of n.
+
+        The parts of the formula that do not depend on n are computed once, as floats, then the formula is evaluated
+        in log-space over a NumPy array of values of n. Hence it is fast and it cannot overflow or underflow.
+
+        Parameters
+        ----------
+        ns: list of int
+            The numbers of voters.
+
+        Returns
+        -------
+        ndarray
+            The natural logarithms of the theoretical equivalent, for each value in `ns`.
+
+        Examples
+        --------
+            >>> from actinvoting.cultures.culture_mallows import CultureMallows
+            >>> session = WorkSession(culture=CultureMallows(m=3, phi=sympy.Rational(1, 2)), c=2)
+            >>> log_equivalents = session.log_equivalent_many([10, 10**6])
+            >>> print(f"{np.exp(log_equivalents[0]):.6f} {float(session.equivalent(n=10)):.6f}")
+            0.015905 0.015905
+            >>> print(f"{log_equivalents[1]:.1f}")
+            -173412.3
+        """
+        return self.numeric_snapshot.log_equivalent_many(ns)
+
+    def equivalent_many(self, ns):
+        """
+        The equivalent of the probability that candidate c is an alpha-winner, for an array of values of n.
+
+        Cf. `log_equivalent_many`.
+
+        Parameters
+        ----------
+        ns: list of int
+            The numbers of voters.
+
+        Returns
+        -------
+        ndarray
+            The values of the theoretical equivalent of the probability, for each value in `ns`.
+        """
+        return np.exp(self.log_equivalent_many(ns))
+
+    def log_upper_bound_many(self, ns):
+        """
+        The logarithm of a rigorous upper bound of the probability that c is an alpha-winner, for an array of values of
+        n.
+
+        This is the Chernoff bound P(zeta)^n / prod_j zeta[j]^(ceil(beta[j] n) - 1), cf. :func:`log_chernoff_bounds`.
+        Unlike the theoretical equivalent, it holds for any n, and it is also defined in supercritical cases (we then
+        use zeta[j] = 1 for the supercritical adversaries). Its logarithm only differs from the one of the equivalent
+        by O(log(n)), and it is even cheaper to compute, so it can be used to skip the expensive computations for the
+        values of n where the probability is negligible.
+
+        Parameters
+        ----------
+        ns: list of int
+            The numbers of voters.
+
+        Returns
+        -------
+        ndarray
+            The natural logarithms of the upper bound, for each value in `ns`.
+
+        Examples
+        --------
+            >>> from actinvoting.cultures.culture_mallows import CultureMallows
+            >>> session = WorkSession(culture=CultureMallows(m=3, phi=sympy.Rational(1, 2)), c=2)
+            >>> upper_bounds = session.upper_bound_many([10, 200])
+            >>> exact_probabilities = session.exact_probabilities([10, 200])
+            >>> [f"{upper_bound:.2e} >= {p:.2e}" for upper_bound, p in zip(upper_bounds, exact_probabilities)]
+            ['4.41e-02 >= 4.44e-03', '2.17e-16 >= 3.29e-18']
+        """
+        tau_short = np.array([self.tau[j] for j in sorted(self.adversaries)], dtype=float)
+        return log_chernoff_bounds(self.characteristic_coefficients_as_logs.ravel(), self.higher_set_indicators,
+                                   tau_short, ns, self.max_counts_many(ns))
+
+    def upper_bound_many(self, ns):
+        """
+        A rigorous upper bound of the probability that c is an alpha-winner, for an array of values of n.
+
+        Cf. `log_upper_bound_many`.
+
+        Parameters
+        ----------
+        ns: list of int
+            The numbers of voters.
+
+        Returns
+        -------
+        ndarray
+            The values of the upper bound, for each value in `ns`.
+        """
+        return np.exp(self.log_upper_bound_many(ns))
+
+    def upper_bound(self, n):
+        """
+        A rigorous upper bound of the probability that c is an alpha-winner in a profile of size n.
+
+        Cf. `log_upper_bound_many`.
+
+        Parameters
+        ----------
+        n: int
+            The number of voters.
+
+        Returns
+        -------
+        float
+            The upper bound.
+        """
+        return float(self.upper_bound_many([n])[0])
+
+    def importance_sampling(self, n, n_samples, seed=None, chunk_size=10000):
+        """
+        Estimate the probability that candidate c is an alpha-winner by importance sampling.
+
+        Voters are drawn from the exponentially tilted culture, where the probability of each ranking is multiplied by
+        the product of zeta[j] over its higher set (then normalized by P(zeta)). Since the event only depends on the
+        number of voters preferring each adversary to `c`, we directly draw the number of voters for each possible
+        higher set, with a multinomial distribution whose probabilities are the tilted coefficients of the
+        characteristic polynomial. Each sample is then reweighted by the likelihood ratio
+        P(zeta)^n / prod_j zeta[j]^(S_j), where S_j is the number of voters preferring j to c.
+
+        When tau is the log saddle point, the tilted distribution is centered on the thresholds, so that even very
+        rare events are hit by a large proportion of the samples. The estimator is unbiased for any tilt, so this also
+        works in supercritical configurations: for an adversary j with tau[j] > 0, we simply do not tilt in its
+        direction (i.e. we use zeta[j] = 1), since the bulk of the distribution is already below its threshold.
+
+        Parameters
+        ----------
+        n: int
+            The number of voters.
+        n_samples: int
+            The number of samples (i.e. of random profiles).
+        seed: int
+            Random seed.
+        chunk_size: int
+            The number of samples drawn at once, which bounds the memory usage.
+
+        Returns
+        -------
+        tuple of float
+            The estimate of the probability and its standard error. The estimate is unbiased, except that it is capped
+            at 1.
+
+        Examples
+        --------
+            >>> from actinvoting.cultures.culture_mallows import CultureMallows
+            >>> session = WorkSession(culture=CultureMallows(m=3, phi=sympy.Rational(1, 2)), c=2)
+            >>> estimate, standard_error = session.importance_sampling(n=200, n_samples=10000, seed=42)
+            >>> print(f"{estimate:.2e} +/- {standard_error:.1e}")
+            3.50e-18 +/- 1.9e-19
+            >>> print(f"{session.exact_probabilities([200])[0]:.2e}")
+            3.29e-18
+        """
+        max_counts = self.max_counts(n)
+        if np.any(max_counts < 0):
+            return 0., 0.
+        rng = np.random.default_rng(seed)
+        indicators = self.higher_set_indicators
+        tau_short = np.minimum(np.array([self.tau[j] for j in sorted(self.adversaries)], dtype=float), 0.)
+        log_tilted = self.characteristic_coefficients_as_logs.ravel() + indicators @ tau_short
+        log_p_of_zeta = logsumexp(log_tilted)
+        probas_tilted = np.exp(log_tilted - log_p_of_zeta)
+        probas_tilted /= probas_tilted.sum()
+        # Log-likelihood ratios are shifted so that the weights are at most 1 on the event.
+        shift = n * log_p_of_zeta + np.sum(np.maximum(-tau_short * max_counts, 0.))
+        sum_weights = 0.
+        sum_squared_weights = 0.
+        n_done = 0
+        while n_done < n_samples:
+            size = min(chunk_size, n_samples - n_done)
+            counts = rng.multinomial(n, probas_tilted, size=size) @ indicators
+            success = np.all(counts <= max_counts, axis=1)
+            weights = np.zeros(size)
+            weights[success] = np.exp(n * log_p_of_zeta - counts[success] @ tau_short - shift)
+            sum_weights += weights.sum()
+            sum_squared_weights += (weights ** 2).sum()
+            n_done += size
+        mean = sum_weights / n_samples
+        variance = max(sum_squared_weights / n_samples - mean ** 2, 0.) * n_samples / max(n_samples - 1, 1)
+        # The estimate can exceed 1 by rounding errors (e.g. when no adversary is tilted), but it is a probability.
+        return min(float(np.exp(shift) * mean), 1.), float(np.exp(shift) * np.sqrt(variance / n_samples))
+
+    def random_duel_counts(self, n, size, rng=None):
+        """
+        Random vectors of duel counts against `c`, without drawing the profiles.
+
+        The event that `c` is an alpha-winner only depends on the number S_j of voters preferring each adversary j to
+        `c`. For each sample, the number of voters whose higher set is each subset of the adversaries follows a
+        multinomial distribution whose probabilities are the coefficients of the characteristic polynomial, and the
+        vector (S_j) is obtained by a product with the indicators of the higher sets. The cost of a sample is in
+        O(2^(m-1)), whatever the value of n.
+
+        Parameters
+        ----------
+        n: int
+            The number of voters.
+        size: int
+            The number of samples.
+        rng: numpy.random.Generator, optional
+            The random generator. Default: the one of the culture.
+
+        Returns
+        -------
+        ndarray
+            Array of shape (size, m-1). Element (k, j) is the number of voters preferring the j-th adversary (in
+            increasing order) to `c` in sample k. Then `c` is an alpha-winner in sample k iff row k is at most
+            `max_counts(n)`.
+
+        Examples
+        --------
+            >>> from actinvoting.cultures.culture_mallows import CultureMallows
+            >>> session = WorkSession(culture=CultureMallows(m=3, phi=sympy.Rational(1, 2)), c=2)
+            >>> counts = session.random_duel_counts(n=11, size=100000, rng=np.random.default_rng(42))
+            >>> counts.shape
+            (100000, 2)
+            >>> print(f"{np.mean(np.all(counts <= session.max_counts(11), axis=1)):.4f}")
+            0.0100
+            >>> print(f"{session.exact_probabilities([11])[0]:.4f}")
+            0.0097
+        """
+        return self.numeric_snapshot.random_duel_counts(n, size, rng=self.culture.rng if rng is None else rng)
+
+    def random_nested_duel_counts(self, ns, size, rng=None):
+        """
+        Random vectors of duel counts against `c` for several numbers of voters, with nested profiles.
+
+        For each sample, a single stream of max(ns) voters is drawn, and the duel counts for each n in `ns` are those of
+        the n first voters. The numbers of voters of each higher set are drawn by multinomial increments between the
+        sorted values of n. Cf. :meth:`random_duel_counts`.
+
+        Parameters
+        ----------
+        ns: list of int
+            The numbers of voters.
+        size: int
+            The number of samples.
+        rng: numpy.random.Generator, optional
+            The random generator. Default: the one of the culture.
+
+        Returns
+        -------
+        ndarray
+            Array of shape (size, len(ns), m-1). Element (k, i, j) is the number of voters preferring the j-th
+            adversary (in increasing order) to `c` among the ns[i] first voters of sample k.
+
+        Examples
+        --------
+            >>> from actinvoting.cultures.culture_mallows import CultureMallows
+            >>> session = WorkSession(culture=CultureMallows(m=3, phi=sympy.Rational(1, 2)), c=2)
+            >>> counts = session.random_nested_duel_counts(ns=[11, 5], size=1000, rng=np.random.default_rng(42))
+            >>> counts.shape
+            (1000, 2, 2)
+            >>> bool(np.all(counts[:, 0] >= counts[:, 1])), bool(np.all(counts[:, 0] - counts[:, 1] <= 6))
+            (True, True)
+        """
+        return self.numeric_snapshot.random_nested_duel_counts(ns, size, rng=self.culture.rng if rng is None else rng)
+
+    @cached_property
+    def numeric_snapshot(self):
+        """
+        The numerical values of the work session, as a lightweight object.
+
+        The theoretical equivalent and the random duel counts of the work session delegate to it, so that the parts
+        that do not depend on n are computed only once. The exact engines do not use it, since they need neither the
+        saddle point nor the integral.
+
+        Returns
+        -------
+        NumericSnapshot
+            A frozen object with the coefficients of the characteristic polynomial, tau, zeta, the Hessian of the
+            cumulant and the integral of the theoretical equivalent, as plain NumPy arrays and floats. It is cheap to
+            pickle, so it should be preferred to the work session when sending tasks to worker processes.
+        """
+        adversaries_sorted = sorted(self.adversaries)
+        betas = [sympy.Rational(self.beta[j]) for j in adversaries_sorted]
+        tau_short = np.array([self.tau[j] for j in adversaries_sorted], dtype=float)
+        integral, integral_error = self.integral_of_gaussian_m_with_error
+        return NumericSnapshot(
+            c=self.c,
+            beta_numerators=tuple(int(beta_j.p) for beta_j in betas),
+            beta_denominators=tuple(int(beta_j.q) for beta_j in betas),
+            coefficients=self.characteristic_coefficients_as_floats.copy(),
+            log_coefficients=self.characteristic_coefficients_as_logs.copy(),
+            tau=tau_short,
+            zeta=np.exp(tau_short),
+            hessian=self.hessian_of_k_at_tau_as_floats.copy(),
+            subcritical=np.array([j in self.subcritical_candidates for j in adversaries_sorted]),
+            critical=np.array([j in self.critical_candidates for j in adversaries_sorted]),
+            integral=float(integral),
+            integral_error=float(integral_error),
+        )
+
+    def max_counts(self, n):
+        """
+        The maximal numbers of voters preferring each adversary to `c` such that `c` is an alpha-winner.
+
+        Parameters
+        ----------
+        n: int
+            The number of voters.
+
+        Returns
+        -------
+        ndarray
+            Vector of size m-1. For each adversary j (in increasing order), the largest integer that is less than
+            beta[j] n, i.e., ceil(beta[j] n) - 1. It is computed exactly when beta[j] is rational.
+        """
+        return self.max_counts_many([n])[0]
+
+    def max_counts_many(self, ns):
+        """
+        Vectorized version of `max_counts`.
+
+        Parameters
+        ----------
+        ns: list of int
+            The numbers of voters.
+
+        Returns
+        -------
+        ndarray
+            Array of shape (len(ns), m-1). Row i is `max_counts(ns[i])`.
+
+        Examples
+        --------
+            >>> from actinvoting.cultures.culture_impartial import CultureImpartial
+            >>> session = WorkSession(culture=CultureImpartial(m=3), c=1, alpha=[sympy.Rational(2, 3)] * 3)
+            >>> session.max_counts_many([1, 2, 3])
+            array([[0, 0],
+                   [0, 0],
+                   [0, 0]])
+        """
+        betas = [sympy.Rational(self.beta[j]) for j in sorted(self.adversaries)]
+        return max_counts_of_thresholds([beta_j.p for beta_j in betas], [beta_j.q for beta_j in betas], ns)
+
+    def exact_probability(self, n, method="sympy"):
         """
         The exact probability that candidate c is an alpha-winner in a profile of size n.
 
-        Take self.polynom_of_duels, raise to the power n, then take the coefficients of all the monomials such
+        Take the characteristic polynomial, raise to the power n, then take the coefficients of all the monomials such
         that for each adversary j, the exponent of x[j] is less than beta[j] n.
 
-        Be careful, this is computationally expensive.
-
         Parameters
         ----------
         n: int
             The number of voters.
+        method: str
+            The engine used for the computation:
+
+            * "sympy": symbolic expansion of P^n. The result is exact, but be careful, this is computationally
+              expensive.
+            * "numeric": dynamic program on the tensor of coefficients of P (as floats), raised to the power n by
+              repeated multiplication. The monomials whose exponents reach the thresholds beta[j] n are discarded
+              as soon as they appear, so the cost is in O(n 2^(m-1) prod_j beta[j] n).
+            * "fft": the polynomial, tilted by the saddle point, is raised to the power n with a single
+              multidimensional FFT, cf. `exact_probability_fft_with_error`. The cost is in O(N log N), where N is
+              slightly more than prod_j beta[j] n.
+            * "polys": same dynamic program as "numeric", but with sympy's sparse polynomial rings over the
+              rationals. The result is exact, like with "sympy", but much faster. The coefficients of P must be
+              rational.
+            * "symmetric": same dynamic program as "numeric", but using the symmetries of the culture, cf.
+              `exchangeable_groups`. Only the vectors of duel counts that are sorted within each group are kept,
+              which saves a factor of about s! for a group of size s. Cf. :func:`symmetric_truncated_power_sum`.
+            * "sharded": same dynamic program as "numeric", but the table is split into slabs that are processed
+              by `n_jobs` processes, cf. :func:`truncated_power_sum_sharded`. The result is identical to "numeric".
 
         Returns
         -------
         float
             The exact probability.
+
+        Examples
+        --------
+            >>> from actinvoting.cultures.culture_impartial import CultureImpartial
+            >>> session = WorkSession(culture=CultureImpartial(m=3), c=2)
+            >>> session.exact_probability(n=3)
+            17/54
+            >>> print(f"{session.exact_probability(n=3, method='numeric'):.6f}")
+            0.314815
+            >>> session.exact_probability(n=3, method='polys')
+            17/54
+            >>> print(f"{session.exact_probability(n=3, method='symmetric'):.6f}")
+            0.314815
+        """
+        if method == "sympy":
+            return self._exact_probability_sympy(n)
+        if method == "numeric":
+            return self._exact_probability_numeric(n)
+        if method == "fft":
+            return self.exact_probability_fft_with_error(n)[0]
+        if method == "polys":
+            return self._exact_probability_polys(n)
+        if method == "sharded":
+            return truncated_power_sum_sharded(self.characteristic_coefficients_as_floats, n, self.max_counts(n),
+                                               n_jobs=self.n_jobs)
+        if method == "symmetric":
+            return symmetric_truncated_power_sum(self.characteristic_coefficients_as_floats, self.exchangeable_groups,
+                                                 n, self.max_counts(n))
+        raise ValueError(f"Unknown method: {method}.")
+
+    def exact_probabilities(self, ns):
         """
+        The exact probabilities that candidate c is an alpha-winner in profiles of sizes `ns`, in a single pass.
+
+        This uses the same dynamic program as `exact_probability` with method "numeric", but the number of voters is
+        increased one by one up to max(ns), keeping the truncated coefficients of P^n in memory and multiplying by P
+        once per step. The probability is read off at each requested n. Hence computing the whole curve costs about
+        the same as computing its largest point.
+
+        Parameters
+        ----------
+        ns: list of int
+            The numbers of voters.
+
+        Returns
+        -------
+        list of float
+            The exact probabilities, in the same order as `ns`.
+
+        Examples
+        --------
+            >>> from actinvoting.cultures.culture_impartial import CultureImpartial
+            >>> session = WorkSession(culture=CultureImpartial(m=3), c=2)
+            >>> [f"{p:.6f}" for p in session.exact_probabilities(ns=[1, 2, 3])]
+            ['0.333333', '0.111111', '0.314815']
+        """
+        ns = list(ns)
+        max_counts = self.max_counts_many(ns)
+        return [float(p) for p in truncated_power_sums(self.characteristic_coefficients_as_floats, ns, max_counts)]
+
+    def exact_log_probabilities(self, ns):
+        """
+        The logarithms of the exact probabilities that candidate c is an alpha-winner in profiles of sizes `ns`.
+
+        This is the same as `exact_probabilities`, but the dynamic program is run in log-space with log-sum-exp
+        convolutions. Hence it can be used for rare events whose probability is below the smallest positive float.
+
+        Parameters
+        ----------
+        ns: list of int
+            The numbers of voters.
+
+        Returns
+        -------
+        list of float
+            The natural logarithms of the exact probabilities, in the same order as `ns` (-inf for a null probability).
+
+        Examples
+        --------
+            >>> from actinvoting.cultures.culture_mallows import CultureMallows
+            >>> session = WorkSession(culture=CultureMallows(m=3, phi=sympy.Rational(1, 100)), c=2)
+            >>> [f"{log_p:.4f}" for log_p in session.exact_log_probabilities(ns=[3, 300])]
+            ['-17.3230', '-1163.0096']
+        """
+        ns = list(ns)
+        max_counts = self.max_counts_many(ns)
+        return [
+            float(log_p)
+            for log_p in truncated_power_log_sums(self.characteristic_coefficients_as_logs, ns, max_counts)
+        ]
+
+    def exact_log_probability(self, n):
+        """
+        The logarithm of the exact probability that candidate c is an alpha-winner in a profile of size n.
+
+        Cf. `exact_log_probabilities`.
+
+        Parameters
+        ----------
+        n: int
+            The number of voters.
+
+        Returns
+        -------
+        float
+            The natural logarithm of the exact probability.
+        """
+        return self.exact_log_probabilities([n])[0]
+
+    def duel_count_distribution(self, n, file_name=None):
+        """
+        The joint distribution of the numbers of voters preferring each adversary to `c`.
+
+        Unlike `exact_probability`, the whole distribution is kept, so that the probability for any other vector
+        alpha is obtained by a table lookup.
+
+        Parameters
+        ----------
+        n: int
+            The number of voters.
+        file_name: str, optional
+            If specified, the tables are stored in memory-mapped files, cf. :class:`DuelCountDistribution`.
+
+        Returns
+        -------
+        DuelCountDistribution
+            The distribution.
+        """
+        return DuelCountDistribution(self.characteristic_coefficients_as_floats, n, file_name=file_name)
+
+    def exact_probability_fft_with_error(self, n):
+        """
+        The exact probability that candidate c is an alpha-winner, computed by FFT, along with an error bound.
+
+        The characteristic polynomial is tilted by the saddle point zeta (capped at 1), then raised to the power n in
+        the Fourier domain. Tilting concentrates the mass around the thresholds beta[j] n, which keeps the rounding
+        errors small relatively to the result, even for rare events. The size of the FFT is chosen so that the aliased
+        mass is below the machine precision, which is checked with a rigorous binomial tail bound. Cf.
+        :func:`fft_power_log_sum` for more details.
+
+        Parameters
+        ----------
+        n: int
+            The number of voters.
+
+        Returns
+        -------
+        tuple of float
+            The probability, along with a bound on the absolute error.
+
+        Examples
+        --------
+        For small n, we can compare with the rational result:
+
+            >>> from actinvoting.cultures.culture_mallows import CultureMallows
+            >>> session = WorkSession(culture=CultureMallows(m=3, phi=sympy.Rational(1, 2)), c=2)
+            >>> probability, error = session.exact_probability_fft_with_error(n=15)
+            >>> bool(abs(probability - float(session.exact_probability(n=15))) <= error < 1e-3 * probability)
+            True
+        """
+        max_counts = self.max_counts(n)
+        if np.any(max_counts < 0):
+            return 0., 0.
+        # For a supercritical adversary (tau[j] > 0), the bulk of the distribution is already below the threshold,
+        # so we do not tilt in its direction.
+        tau_short = np.minimum(np.array([self.tau[j] for j in sorted(self.adversaries)], dtype=float), 0.)
+        log_probability, log_error = fft_power_log_sum(self.characteristic_coefficients_as_floats, tau_short, n,
+                                                       max_counts)
+        return float(np.exp(log_probability)), float(np.exp(log_error))
+
+    def _exact_probability_numeric(self, n):
+        max_counts = self.max_counts(n)
+        if np.any(max_counts < 0):
+            return 0.
+        return float(truncated_power(self.characteristic_coefficients_as_floats, n, max_counts).sum())
+
+    def _exact_probability_polys(self, n):
+        max_counts = self.max_counts(n)
+        if np.any(max_counts < 0):
+            return sympy.Rational(0, 1)
+        polynomial_ring, *_ = ring([str(self.x[j]) for j in sorted(self.adversaries)], QQ)
+        p = polynomial_ring.from_dict({
+            mask: QQ.from_sympy(sympy.Rational(coefficient))
+            for mask, coefficient in np.ndenumerate(self.characteristic_coefficients)
+            if coefficient != 0
+        })
+        p_power = polynomial_ring.one
+        for _ in range(n):
+            # Since exponents never decrease, the monomials exceeding the thresholds can be discarded right away.
+            p_power = polynomial_ring.from_dict({
+                monomial: coefficient for monomial, coefficient in (p_power * p).items()
+                if all(exponent <= max_count for exponent, max_count in zip(monomial, max_counts))
+            })
+        return QQ.to_sympy(sum(p_power.values(), QQ.zero))
+
+    def _exact_probability_sympy(self, n):
         p_n = self.characteristic_polynomial ** n
         probability = sympy.Rational(0, 1)
         for monomial in sympy.expand(p_n).as_ordered_terms():
@@ -366,3 +1108,32 @@ class WorkSession:
             if all(exponents[self.x[j]] < n * self.beta[j] for j in self.adversaries):
                 probability += monomial.subs({self.x[j]: 1 for j in self.adversaries})
         return probability
+
+
+def _probas_high_low(culture, c, adversaries_sorted, subsets):
+    """
+    Coefficients of the characteristic polynomial for some higher sets, cf. `WorkSession.characteristic_coefficients`.
+
+    Parameters
+    ----------
+    culture: Culture
+        The culture.
+    c: int
+        The candidate of interest.
+    adversaries_sorted: list of int
+        The adversaries of `c`, in increasing order.
+    subsets: list of tuple
+        The higher sets.
+
+    Returns
+    -------
+    list of tuple
+        For each higher set, its indicator vector (as a tuple) and the probability that the adversaries higher than
+        `c` are exactly those of the set.
+    """
+    adversaries = set(adversaries_sorted)
+    return [
+        (tuple(int(d in higher) for d in adversaries_sorted),
+         culture.proba_high_low(c, set(higher), adversaries - set(higher)))
+        for higher in subsets
+    ]
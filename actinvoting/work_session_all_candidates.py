@@ -0,0 +1,261 @@
+import numpy as np
+import sympy
+from joblib import Parallel, delayed
+
+from actinvoting.numeric_snapshot import NumericSnapshot
+from actinvoting.util_cache import cached_property
+from actinvoting.util_gaussian import orthant_integral_of_gaussian
+from actinvoting.util_saddle_point import solve_saddle_point, tilted_moments
+
+
+class WorkSessionAllCandidates:
+    """
+    A working session for all the candidates at once, specifying the culture and the vector of thresholds alpha.
+
+    This is equivalent to m instances of :class:`WorkSession` (one for each candidate), but the work is shared: the
+    coefficients of the m characteristic polynomials are built from a single pass over the probabilities of the
+    rankings, and the m saddle points are computed by a Newton method that is vectorized over the candidates.
+
+    Parameters
+    ----------
+    culture : Culture
+        The culture, i.e., the probability distribution over the rankings.
+    alpha : list of sympy.Rational, optional
+        The vector of thresholds alpha. If not specified, it is set to [1/2, 1/2, ..., 1/2], corresponding to the usual
+        notion of Condorcet winner. For each candidate c, the coefficient alpha[c] is not used.
+    n_jobs : int
+        The number of parallel jobs used to compute the integrals of the theoretical equivalents (one per
+        candidate). If n_jobs=1, the computation is done in a single process.
+
+    Examples
+    --------
+        >>> from actinvoting.cultures.culture_mallows import CultureMallows
+        >>> session = WorkSessionAllCandidates(culture=CultureMallows(m=3, phi=sympy.Rational(1, 2)))
+        >>> [f"{equivalent:.6f}" for equivalent in session.equivalents(n=10)]
+        ['nan', 'nan', '0.015905']
+        >>> session.subcritical_candidates
+        [set(), {0}, {0, 1}]
+        >>> session.critical_candidates
+        [set(), set(), set()]
+        >>> session.supercritical_candidates
+        [{1, 2}, {2}, set()]
+    """
+
+    def __init__(self, culture, alpha=None, n_jobs=1):
+        if alpha is None:
+            alpha = [sympy.Rational(1, 2)] * culture.m
+        self.culture = culture
+        self.m = self.culture.m
+        self.alpha = alpha
+        self.beta = [1 - alpha[d] for d in range(self.m)]
+        self.n_jobs = n_jobs
+
+    def _adversaries_sorted(self, c):
+        return [j for j in range(self.m) if j != c]
+
+    @cached_property
+    def characteristic_coefficients_as_floats(self):
+        """
+        The coefficients of the characteristic polynomials of all the candidates, as floats.
+
+        Returns
+        -------
+        ndarray
+            Array of shape (m, 2, ..., 2) (with m-1 times 2). Element c is the tensor of coefficients of the
+            characteristic polynomial of candidate c, cf. :attr:`WorkSession.characteristic_coefficients`.
+        """
+        bordas = self.culture.average_profile.unique_bordas
+        weights = np.array(self.culture.average_profile.multiplicities, dtype=float)
+        weights /= weights.sum()
+        coefficients = np.zeros((self.m, ) + (2, ) * (self.m - 1))
+        for c in range(self.m):
+            # For each ranking, the indicator vector of the adversaries that are higher than c.
+            masks = bordas[:, self._adversaries_sorted(c)] > bordas[:, [c]]
+            np.add.at(coefficients[c], tuple(masks.T.astype(int)), weights)
+        return coefficients
+
+    @cached_property
+    def characteristic_coefficients_as_logs(self):
+        """
+        The logarithms of the coefficients of the characteristic polynomials (-inf for null coefficients).
+
+        Returns
+        -------
+        ndarray
+            Same shape as `characteristic_coefficients_as_floats`.
+        """
+        with np.errstate(divide='ignore'):
+            return np.log(self.characteristic_coefficients_as_floats)
+
+    @cached_property
+    def higher_set_indicators(self):
+        """
+        The indicators of the possible higher sets, in the same order as the flattened coefficients of each candidate.
+
+        Returns
+        -------
+        ndarray
+            Array of shape (2^(m-1), m-1).
+        """
+        return np.array(list(np.ndindex((2, ) * (self.m - 1))), dtype=int).reshape(-1, self.m - 1)
+
+    @cached_property
+    def tau(self):
+        """
+        The log saddle points of all the candidates.
+
+        Returns
+        -------
+        ndarray
+            Array of shape (m, m-1). Row c is the log saddle point of candidate c, indexed by its adversaries in
+            increasing order.
+        """
+        betas = np.array([[self.beta[j] for j in self._adversaries_sorted(c)] for c in range(self.m)], dtype=float)
+        return solve_saddle_point(self.characteristic_coefficients_as_logs.reshape(self.m, -1),
+                                  self.higher_set_indicators, betas)
+
+    @cached_property
+    def hessian_of_k_at_tau(self):
+        """
+        The Hessians of the cumulants at the log saddle points.
+
+        Returns
+        -------
+        ndarray
+            Array of shape (m, m-1, m-1).
+        """
+        return tilted_moments(self.characteristic_coefficients_as_logs.reshape(self.m, -1),
+                              self.higher_set_indicators, self.tau)[2]
+
+    @cached_property
+    def subcritical_candidates(self):
+        """
+        The subcritical adversaries of each candidate.
+
+        Returns
+        -------
+        list of set
+            Element c is the set of subcritical adversaries for candidate c, cf.
+            :attr:`WorkSession.subcritical_candidates`.
+        """
+        return [{j for j, tau_j in zip(self._adversaries_sorted(c), self.tau[c])
+                 if tau_j < 0 and not np.isclose(tau_j, 0)} for c in range(self.m)]
+
+    @cached_property
+    def critical_candidates(self):
+        """
+        The critical adversaries of each candidate.
+
+        Returns
+        -------
+        list of set
+            Element c is the set of critical adversaries for candidate c, cf. :attr:`WorkSession.critical_candidates`.
+        """
+        return [{j for j, tau_j in zip(self._adversaries_sorted(c), self.tau[c]) if np.isclose(tau_j, 0)}
+                for c in range(self.m)]
+
+    @cached_property
+    def supercritical_candidates(self):
+        """
+        The supercritical adversaries of each candidate.
+
+        Returns
+        -------
+        list of set
+            Element c is the set of adversaries that are neither subcritical nor critical for candidate c.
+        """
+        return [set(self._adversaries_sorted(c)) - self.subcritical_candidates[c] - self.critical_candidates[c]
+                for c in range(self.m)]
+
+    @cached_property
+    def numeric_snapshots(self):
+        """
+        The numerical values of the work session of each candidate.
+
+        The integrals of the theoretical equivalents are computed in parallel if `n_jobs` > 1.
+
+        Returns
+        -------
+        list of NumericSnapshot
+            Element c is the same as `WorkSession(culture, c, alpha).numeric_snapshot`, up to numerical precision.
+        """
+        return list(Parallel(n_jobs=self.n_jobs)(
+            delayed(_numeric_snapshot)(
+                c=c,
+                betas=[sympy.Rational(self.beta[j]) for j in self._adversaries_sorted(c)],
+                coefficients=self.characteristic_coefficients_as_floats[c],
+                log_coefficients=self.characteristic_coefficients_as_logs[c],
+                tau=self.tau[c],
+                hessian=self.hessian_of_k_at_tau[c],
+                critical_candidates=self.critical_candidates[c],
+                subcritical_candidates=self.subcritical_candidates[c],
+            )
+            for c in range(self.m)
+        ))
+
+    def log_equivalents_many(self, ns):
+        """
+        The logarithms of the theoretical equivalents for all the candidates, for an array of values of n.
+
+        Parameters
+        ----------
+        ns: list of int
+            The numbers of voters.
+
+        Returns
+        -------
+        ndarray
+            Array of shape (len(ns), m). Element (i, c) is the natural logarithm of the equivalent of the probability
+            that c is an alpha-winner with ns[i] voters. It is nan if some adversary of c is supercritical.
+        """
+        result = np.full((len(ns), self.m), np.nan)
+        for c, snapshot in enumerate(self.numeric_snapshots):
+            if not self.supercritical_candidates[c]:
+                result[:, c] = snapshot.log_equivalent_many(ns)
+        return result
+
+    def equivalents(self, n):
+        """
+        The theoretical equivalents for all the candidates.
+
+        Parameters
+        ----------
+        n: int
+            The number of voters.
+
+        Returns
+        -------
+        ndarray
+            Vector of size m. Element c is the equivalent of the probability that c is an alpha-winner. It is nan if
+            some adversary of c is supercritical.
+        """
+        return np.exp(self.log_equivalents_many([n])[0])
+
+
+def _numeric_snapshot(c, betas, coefficients, log_coefficients, tau, hessian, critical_candidates,
+                      subcritical_candidates):
+    """
+    Numeric snapshot for one candidate, cf. :attr:`WorkSessionAllCandidates.numeric_snapshots`.
+    """
+    adversaries_sorted = [j for j in range(coefficients.ndim + 1) if j != c]
+    critical = np.array([j in critical_candidates for j in adversaries_sorted])
+    subcritical = np.array([j in subcritical_candidates for j in adversaries_sorted])
+    if np.any(critical):
+        matrix_m = np.linalg.inv(hessian)[critical, :][:, critical]
+        integral, integral_error = orthant_integral_of_gaussian(matrix_m, seed=0)
+    else:
+        integral, integral_error = 1., 0.
+    return NumericSnapshot(
+        c=c,
+        beta_numerators=tuple(int(beta_j.p) for beta_j in betas),
+        beta_denominators=tuple(int(beta_j.q) for beta_j in betas),
+        coefficients=coefficients.copy(),
+        log_coefficients=log_coefficients.copy(),
+        tau=tau.copy(),
+        zeta=np.exp(tau),
+        hessian=hessian.copy(),
+        subcritical=subcritical,
+        critical=critical,
+        integral=float(integral),
+        integral_error=float(integral_error),
+    )
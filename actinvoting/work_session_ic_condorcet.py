@@ -1,15 +1,36 @@
 import numpy as np
 import sympy
-from scipy.integrate import nquad
 
 from actinvoting.cultures.culture_impartial import CultureImpartial
 from actinvoting.util_cache import cached_property
+from actinvoting.util_gaussian import orthant_probability_equicorrelated
 from actinvoting.work_session import WorkSession
 
 
 class WorkSessionICCondorcet(WorkSession):
     """
     A work session dedicated to Impartial Culture, implementing the second term in the asymptotic expansion.
+
+    Under Impartial Culture, all the quantities of the theoretical equivalent have closed forms, so that neither the
+    characteristic polynomial nor numerical integration in dimension m-1 are needed. At tau = 0, the indicators of
+    the adversaries that are higher than `c` have variance 1/4 and pairwise covariance 1/12, hence the Hessian of the
+    cumulant is H = I / 6 + J / 12, where J is the matrix of ones. Its determinant is (m + 1) / (2 6^(m-1)) and its
+    inverse is 6 I - 6 J / (m + 1). The integrals reduce to orthant probabilities of an equicorrelated Gaussian
+    vector, cf. :func:`orthant_probability_equicorrelated`.
+
+    Parameters
+    ----------
+    m: int
+        Number of candidates.
+
+    Examples
+    --------
+        >>> session = WorkSessionICCondorcet(m=4)
+        >>> print(f"{float(session.equivalent(n=10)):.6f} {session.asymptotics(n=10):.6f}")
+        0.206130 0.096292
+        >>> session = WorkSessionICCondorcet(m=50)
+        >>> print(f"{float(session.equivalent(n=100)):.6f} {session.asymptotics(n=100):.6f}")
+        0.003137 0.001670
     """
 
     def __init__(self, m):
@@ -26,12 +47,52 @@ class WorkSessionICCondorcet(WorkSession):
         # All candidates are critical.
         return self.adversaries
 
+    @cached_property
+    def p_of_zeta(self):
+        # The characteristic polynomial is a probability generating function, and zeta = 1.
+        return sympy.Integer(1)
+
+    @cached_property
+    def hessian_of_k_at_tau(self):
+        return sympy.eye(self.m - 1) / 6 + sympy.ones(self.m - 1, self.m - 1) / 12
+
+    @cached_property
+    def hessian_of_k_at_tau_as_floats(self):
+        return np.eye(self.m - 1) / 6 + np.ones((self.m - 1, self.m - 1)) / 12
+
+    @cached_property
+    def det_hessian_of_k_at_tau(self):
+        return sympy.Rational(self.m + 1, 2) / 6**(self.m - 1)
+
+    @cached_property
+    def inverse_of_hessian_of_k_at_tau(self):
+        return 6 * sympy.eye(self.m - 1) - sympy.Rational(6, self.m + 1) * sympy.ones(self.m - 1, self.m - 1)
+
+    @cached_property
+    def matrix_m(self):
+        return 6 * np.eye(self.m - 1) - 6 / (self.m + 1) * np.ones((self.m - 1, self.m - 1))
+
+    @cached_property
+    def integral_of_gaussian_m_with_error(self):
+        # The integral is (2 pi)^(k/2) sqrt(det(H)) P(Y >= 0), where Y ~ N(0, H) has correlation 1/3.
+        proba, error = orthant_probability_equicorrelated(self.m - 1, 1 / 3)
+        factor = np.sqrt((2 * np.pi)**(self.m - 1) * float(self.det_hessian_of_k_at_tau))
+        return factor * proba, factor * error
+
     @cached_property
     def integral_for_error_term_with_error(self):
-        m = np.array(self.matrix_m, dtype=float)
-        def f(*u):
-            return np.array(u).sum() * np.exp(- np.array(u) @ m @ np.array(u) / 2)
-        return nquad(f, [[0, np.inf]] * self.n_critical_candidates)
+        # The integral of sum(u) exp(-u^T M u / 2) over the positive orthant is (2 pi)^(k/2) sqrt(det(H)) times
+        # E[sum_j Y_j 1{Y >= 0}], where Y ~ N(0, H). By Tallis' formula, E[Y_j 1{Y >= 0}] = sum_i H_ji g_i, where
+        # g_i = phi(0) / sqrt(H_ii) P(Y_{-i} >= 0 | Y_i = 0). Conditionally on Y_i = 0, the other coordinates are
+        # equicorrelated with correlation 1/4. Since the rows of H sum to (k + 2) / 12 = (m + 1) / 12, we obtain
+        # E[sum_j Y_j 1{Y >= 0}] = k (m + 1) / 12 * 2 / sqrt(2 pi) * P_{k-1}(1/4).
+        k = self.m - 1
+        proba, error = orthant_probability_equicorrelated(k - 1, 1 / 4)
+        factor = (
+            np.sqrt((2 * np.pi)**k * float(self.det_hessian_of_k_at_tau))
+            * k * (self.m + 1) / 12 * 2 / np.sqrt(2 * np.pi)
+        )
+        return factor * proba, factor * error
 
     @cached_property
     def integral_for_error_term(self):
@@ -0,0 +1,135 @@
+import numpy as np
+import sympy
+
+from actinvoting.util_cache import cached_property
+from actinvoting.util_saddle_point import log_equivalent_constants, solve_saddle_point, tilted_moments
+from actinvoting.work_session import WorkSession
+
+
+class WorkSessionParametric(WorkSession):
+    """
+    A work session where the culture depends on symbolic parameters, e.g. the concentration `phi` of a Mallows culture.
+
+    The coefficients of the characteristic polynomial are kept symbolic in the parameters and converted once into a
+    NumPy function (with common subexpression elimination). Then the theoretical equivalent is given as a vectorized
+    function of the parameters and n: for each value of the parameters, the log saddle point is computed by a
+    Newton method that is vectorized over all the values at once. This is useful for phase diagrams on dense grids.
+
+    Parameters
+    ----------
+    culture : Culture
+        The culture, whose probabilities depend on the symbols in `parameters`.
+    c : int
+        The candidate of interest.
+    parameters : list of sympy.Symbol
+        The parameters of the culture.
+    alpha : list of sympy.Rational, optional
+        The vector of thresholds alpha. Cf. :class:`WorkSession`.
+    cache_dir : str, optional
+        If specified, the NumPy code of the coefficients is cached in this directory. Cf. :class:`WorkSession`.
+    n_jobs : int, optional
+        The number of parallel jobs used to compute the coefficients of the characteristic polynomial. Cf.
+        :class:`WorkSession`.
+
+    Examples
+    --------
+        >>> from actinvoting.cultures.culture_mallows import CultureMallows
+        >>> phi = sympy.Symbol('phi', positive=True)
+        >>> session = WorkSessionParametric(culture=CultureMallows(m=3, phi=phi), c=2, parameters=[phi])
+        >>> equivalents = session.equivalent_function([.5, .9], [[10], [100]])
+        >>> equivalents.shape
+        (2, 2)
+        >>> print(f"{equivalents[0, 0]:.6f}")
+        0.015905
+        >>> reference = WorkSession(culture=CultureMallows(m=3, phi=sympy.Rational(9, 10)), c=2)
+        >>> print(f"{equivalents[1, 1]:.4f} {float(reference.equivalent(n=100)):.4f}")
+        0.4811 0.4811
+    """
+
+    def __init__(self, culture, c, parameters, alpha=None, cache_dir=None, n_jobs=1):
+        super().__init__(culture=culture, c=c, alpha=alpha, cache_dir=cache_dir, n_jobs=n_jobs)
+        self.parameters = list(parameters)
+
+    @cached_property
+    def coefficients_function(self):
+        """
+        The coefficients of the characteristic polynomial, as a NumPy function of the parameters.
+
+        Returns
+        -------
+        callable
+            A function with one argument per parameter (arrays are broadcast together). It returns an array of shape
+            (..., 2^(m-1)), where the last axis follows the flattened `characteristic_coefficients`.
+        """
+        coefficients_lambdified = self._lambdify(
+            "coefficients", lambda: sympy.Tuple(*self.characteristic_coefficients.ravel()), args=self.parameters)
+
+        def coefficients_function(*values):
+            values = np.broadcast_arrays(*[np.array(value, dtype=float) for value in values])
+            coefficients = coefficients_lambdified(*values)
+            # Constant coefficients are returned as scalars.
+            return np.stack(np.broadcast_arrays(*[np.array(coefficient, dtype=float) for coefficient in coefficients]),
+                            axis=-1)
+        return coefficients_function
+
+    @cached_property
+    def log_equivalent_function(self):
+        """
+        The logarithm of the theoretical equivalent, as a vectorized function of the parameters and n.
+
+        Returns
+        -------
+        callable
+            A function with one argument per parameter, followed by the argument n. All the arguments are broadcast
+            together, and the result has the broadcast shape. For the values of the parameters where some adversary
+            is supercritical, the result is nan.
+        """
+        indicators = self.higher_set_indicators
+
+        def log_equivalent_function(*args):
+            *values, ns = args
+            values = np.broadcast_arrays(*[np.array(value, dtype=float) for value in values])
+            ns = np.array(ns, dtype=np.int64)
+            shape = np.broadcast_shapes(values[0].shape, ns.shape)
+            # Solve the saddle point once per distinct value of the parameters.
+            distinct_values, inverse = np.unique(
+                np.stack([value.ravel() for value in values], axis=-1), axis=0, return_inverse=True)
+            with np.errstate(divide='ignore'):
+                log_coefficients = np.log(self.coefficients_function(*distinct_values.T))
+            taus = solve_saddle_point(log_coefficients, indicators, self.beta_short)
+            log_p_of_zetas, _, hessians = tilted_moments(log_coefficients, indicators, taus)
+            # For each distinct value: log P(zeta), -tau_j for subcritical j (0 otherwise), number of subcritical
+            # adversaries, constant term.
+            slopes = np.zeros(taus.shape)
+            n_subcriticals = np.zeros(len(taus))
+            constants = np.full(len(taus), np.nan)
+            for i, (tau, hessian) in enumerate(zip(taus, hessians)):
+                try:
+                    subcritical, constants[i] = log_equivalent_constants(tau, hessian)
+                except NotImplementedError:
+                    continue
+                slopes[i, subcritical] = -tau[subcritical]
+                n_subcriticals[i] = np.sum(subcritical)
+            index = np.broadcast_to(inverse.reshape(values[0].shape), shape).ravel()
+            ns = np.broadcast_to(ns, shape).ravel()
+            max_counts = self.max_counts_many(ns)
+            result = (
+                ns * log_p_of_zetas[index] + np.sum(max_counts * slopes[index], axis=1)
+                - n_subcriticals[index] * np.log(ns) / 2 + constants[index]
+            )
+            return result.reshape(shape)
+        return log_equivalent_function
+
+    @cached_property
+    def equivalent_function(self):
+        """
+        The theoretical equivalent, as a vectorized function of the parameters and n.
+
+        Returns
+        -------
+        callable
+            Same as `log_equivalent_function`, but returns the equivalent itself.
+        """
+        def equivalent_function(*args):
+            return np.exp(self.log_equivalent_function(*args))
+        return equivalent_function